@@ -0,0 +1,40 @@
+"""Per-rerun stylesheet cost: legacy build_css(t) vs static sheet + memoized theme block.
+
+    python benchmarks/bench_css.py [-n 2000]
+"""
+import argparse, os, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from neurachat.styles import CSS_PATH, STATIC_CSS, THEMES, THEME_VARS, theme_css
+
+def legacy_template() -> str:
+    # Rebuild the old single f-string: theme values inlined into :root, every
+    # rule unminified, the whole sheet formatted again on each rerun.
+    with open(CSS_PATH, encoding="utf-8") as f:
+        css = f.read().replace("{", "{{").replace("}", "}}")
+    root = "".join(f"  --{k}: {{{k}}};\n" for k in THEME_VARS)
+    return "\n<style>\n" + css.replace(":root {{\n", ":root {{\n" + root, 1) + "</style>\n"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=2000, help="reruns per measurement")
+    n = ap.parse_args().n
+
+    tpl    = legacy_template()
+    names  = list(THEMES)
+    legacy = lambda: tpl.format(**THEMES[names[0]])
+    new    = lambda: (STATIC_CSS, theme_css(names[0]))
+
+    old_us = min(timeit.repeat(legacy, number=n, repeat=5)) / n * 1e6
+    new_us = min(timeit.repeat(new, number=n, repeat=5)) / n * 1e6
+    old_b  = len(legacy().encode())
+    new_b  = len(STATIC_CSS.encode()) + len(theme_css(names[0]).encode())
+    swap_b = max(len(theme_css(t).encode()) for t in names)
+
+    print(f"{'':<28}{'legacy':>12}{'split':>12}")
+    print(f"{'CPU per rerun (µs)':<28}{old_us:>12.2f}{new_us:>12.2f}")
+    print(f"{'bytes emitted per rerun':<28}{old_b:>12,}{new_b:>12,}")
+    print(f"{'bytes changed on theme swap':<28}{old_b:>12,}{swap_b:>12,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Import-time report for the app's modules (python -X importtime, in fresh interpreters).
+
+    python benchmarks/bench_import.py [-n 5] [--top 15] [--budget-ms 150]
+
+Reports the median cumulative import time of each neurachat module, the most
+expensive packages pulled in, and flags heavy optional dependencies (openai,
+fpdf, docx, dotenv, tiktoken) that got imported eagerly. With --budget-ms the
+exit status is non-zero when the total exceeds the budget, so CI can catch
+regressions.
+"""
+import argparse, os, statistics, subprocess, sys
+
+ROOT    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["neurachat.batch", "neurachat.cache", "neurachat.catalog", "neurachat.client", "neurachat.compare", "neurachat.context", "neurachat.exports",
+           "neurachat.flight", "neurachat.health", "neurachat.hedge", "neurachat.limiter",
+           "neurachat.metrics", "neurachat.models", "neurachat.prompts", "neurachat.render", "neurachat.resume",
+           "neurachat.router", "neurachat.server", "neurachat.stats", "neurachat.store", "neurachat.styles",
+           "neurachat.tokens", "neurachat.topics"]
+LAZY    = ["openai", "fpdf", "docx", "dotenv", "tiktoken"]
+
+def sample(modules: list) -> list:
+    """One fresh interpreter; returns [(module, self_us, cumulative_us, depth)] in import order."""
+    code = "; ".join(f"import {m}" for m in modules)
+    out  = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cum_us), (len(name) - len(name.lstrip())) // 2))
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=5, help="fresh interpreters to sample")
+    ap.add_argument("--top", type=int, default=15, help="most expensive packages to list")
+    ap.add_argument("--budget-ms", type=float, help="fail when the total exceeds this")
+    ap.add_argument("modules", nargs="*", default=MODULES)
+    args = ap.parse_args()
+
+    runs   = [sample(args.modules) for _ in range(args.n)]
+    cum    = {}
+    selfs  = {}
+    totals = []
+    for rows in runs:
+        totals.append(sum(c for n, s, c, d in rows if d == 1) / 1000)
+        for name, s, c, d in rows:
+            cum.setdefault(name, []).append(c / 1000)
+            selfs.setdefault(name.split(".")[0], []).append(s / 1000)
+
+    total = statistics.median(totals)
+    print(f"{len(args.modules)} modules, median of {args.n} fresh interpreters: {total:.1f} ms total\n")
+    print(f"{'module':<24} {'cumulative ms':>14}")
+    for m in args.modules:
+        if m in cum:
+            print(f"{m:<24} {statistics.median(cum[m]):>14.1f}")
+
+    # Self time summed per top-level package, per run, then the median.
+    per_pkg = {}
+    for rows in runs:
+        acc = {}
+        for name, s, c, d in rows:
+            acc[name.split(".")[0]] = acc.get(name.split(".")[0], 0) + s / 1000
+        for k, v in acc.items():
+            per_pkg.setdefault(k, []).append(v)
+    print(f"\n{'package (self time)':<24} {'ms':>14}")
+    for k, v in sorted(per_pkg.items(), key=lambda kv: -statistics.median(kv[1]))[:args.top]:
+        print(f"{k:<24} {statistics.median(v):>14.1f}")
+
+    eager = [m for m in LAZY if m in cum]
+    print("\neagerly imported optional deps:", ", ".join(eager) if eager else "none")
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"over budget: {total:.1f} ms > {args.budget_ms:g} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""End-to-end streaming benchmark against the local mock OpenRouter server.
+
+    python benchmarks/bench_stream.py [-c 1 4 16] [-n 32] [--ttft 0.3] [--tps 80]
+
+Starts benchmarks/mock_openrouter.py on a free port, then pushes requests through
+the real Router (fallback, coalescing, health) and render_stream (flush pacing,
+block freezing) with a counting stand-in for the Streamlit placeholder.
+"""
+import argparse, os, socket, subprocess, sys, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from neurachat.client import HttpPool, make_client
+from neurachat.health import ModelHealth
+from neurachat.limiter import RateLimiter
+from neurachat.models import FREE_MODEL_CTX, FREE_MODELS
+from neurachat.render import FlushPolicy, render_stream
+from neurachat.router import Router
+
+class CountingSlot:
+    def __init__(self, tally: dict):
+        self.tally = tally
+
+    def markdown(self, text: str):
+        self.tally["flushes"] += 1
+        self.tally["bytes"]   += len(text.encode())
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_mock(port: int, args) -> subprocess.Popen:
+    cmd = [sys.executable, os.path.join(ROOT, "benchmarks", "mock_openrouter.py"),
+           "--port", str(port), "--ttft", str(args.ttft), "--tps", str(args.tps),
+           "--chunk-tokens", str(args.chunk_tokens), "--reply-tokens", str(args.reply_tokens),
+           "--fail-rate", str(args.fail_rate), "--cut-rate", str(args.cut_rate)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    url  = f"http://127.0.0.1:{port}/v1/models"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url, timeout=0.5).read()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise SystemExit("mock server did not start")
+
+def pct(xs: list, q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+def one(router: Router, i: int, policy_ms: tuple) -> dict:
+    tally = {"flushes": 0, "bytes": 0}
+    slot  = CountingSlot(tally)
+    t0    = time.monotonic()
+    first = []
+    info  = {}
+    msgs  = [{"role": "user", "content": f"benchmark prompt {i}"}]
+    chunks = []
+
+    def counted():
+        for c in router.stream(msgs, FREE_MODELS[0][1], "You are a benchmark.", 0.7, 1024, info=info):
+            chunks.append(c)
+            yield c
+
+    reply = render_stream(counted(), slot, lambda: slot, FlushPolicy(*policy_ms),
+                          on_first=lambda: first.append(time.monotonic() - t0))
+    return {"ttft": first[0] if first else 0.0, "e2e": time.monotonic() - t0, "chunks": len(chunks),
+            "tokens": len(reply.split()), "ok": "model" in info, **tally}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("-n", "--requests", type=int, default=32, help="requests per concurrency level")
+    ap.add_argument("--ttft", type=float, default=0.3)
+    ap.add_argument("--tps", type=float, default=80.0)
+    ap.add_argument("--chunk-tokens", type=int, default=3)
+    ap.add_argument("--reply-tokens", type=int, default=300)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--cut-rate", type=float, default=0.0, help="share of streams the mock drops halfway")
+    ap.add_argument("--pool", type=int, default=64, help="HTTP connection pool size")
+    ap.add_argument("--no-prewarm", action="store_true", help="leave the pool cold before the first level")
+    ap.add_argument("--rpm", type=float, default=0.0, help="per-model rate limit (0 = unlimited)")
+    ap.add_argument("--flush-ms", type=float, nargs=2, default=[50.0, 400.0], metavar=("BASE", "MAX"))
+    args = ap.parse_args()
+
+    port = free_port()
+    mock = start_mock(port, args)
+    try:
+        base   = f"http://127.0.0.1:{port}/v1"
+        pool   = HttpPool(max_connections=args.pool, max_keepalive=args.pool)
+        if not args.no_prewarm:
+            pool.prewarm(base).join()
+        client = make_client("sk-bench", base_url=base, pool=pool)
+        print(f"mock: ttft {args.ttft}s, {args.tps:g} tok/s, {args.chunk_tokens} tok/chunk, "
+              f"{args.reply_tokens} tok/reply, fail rate {args.fail_rate:g}, cut rate {args.cut_rate:g}")
+        print(f"{'conc':>4} {'req/s':>7} {'ttft p50':>9} {'ttft p95':>9} {'e2e p50':>8} {'e2e p95':>8} "
+              f"{'chunks/s':>9} {'cpu µs/tok':>11} {'flushes':>8} {'KB/reply':>9} {'ok':>5}")
+        for conc in args.concurrency:
+            router = Router(client, FREE_MODEL_CTX, ModelHealth(), limiter=RateLimiter(model_rate=args.rpm / 60))
+            cpu0, t0 = time.process_time(), time.monotonic()
+            with ThreadPoolExecutor(conc) as ex:
+                rs = list(ex.map(lambda i: one(router, i, tuple(args.flush_ms)), range(args.requests)))
+            wall, cpu = time.monotonic() - t0, time.process_time() - cpu0
+            tokens = sum(r["tokens"] for r in rs) or 1
+            print(f"{conc:>4} {len(rs) / wall:>7.2f} "
+                  f"{pct([r['ttft'] for r in rs], .5) * 1000:>7.0f}ms {pct([r['ttft'] for r in rs], .95) * 1000:>7.0f}ms "
+                  f"{pct([r['e2e'] for r in rs], .5):>7.2f}s {pct([r['e2e'] for r in rs], .95):>7.2f}s "
+                  f"{sum(r['chunks'] for r in rs) / wall:>9.0f} {cpu / tokens * 1e6:>11.1f} "
+                  f"{sum(r['flushes'] for r in rs) / len(rs):>8.1f} "
+                  f"{sum(r['bytes'] for r in rs) / len(rs) / 1024:>9.1f} "
+                  f"{sum(r['ok'] for r in rs):>2}/{len(rs):<2}")
+        p = pool.snapshot()
+        print(f"pool: {p['requests']} requests, peak {p['peak']}/{p['max']} in flight, "
+              f"{p['saturated']} sent saturated, {p['open']} open / {p['idle']} idle connections")
+    finally:
+        mock.terminate()
+
+if __name__ == "__main__":
+    main()
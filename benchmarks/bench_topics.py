@@ -0,0 +1,101 @@
+"""Topic detection: legacy substring scans vs the precompiled matcher.
+
+    python benchmarks/bench_topics.py [-n 200] [--corpus prompts.txt]
+"""
+import argparse, os, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from neurachat.topics import detect_topic, get_refs, topic_scores
+
+CORPUS = [
+    "What is the capital of France?",
+    "Explain the software architecture of a microservice platform",
+    "Write a python function that parses ISO dates",
+    "Build a FastAPI REST API with JWT authentication",
+    "Create a flowchart for user authentication",
+    "Explain gradient descent step by step",
+    "Write a professional cover letter for a software engineer",
+    "Compare React, Vue, and Angular in a table",
+    "Generate a mindmap of machine learning concepts",
+    "Solve the integral of x^2 * sin(x) dx",
+    "What caused the fall of the Roman Empire in the fifth century?",
+    "Summarize the key ideas of quantum entanglement for a beginner",
+    "Draft a polite email asking my landlord to fix the heating",
+    "How do I undo the last commit with git?",
+    "What's the difference between a process and a thread?",
+    "Give me a recipe for a quick vegetarian dinner",
+    "Evaluate the pros and cons of remote work for startups",
+    "Prove that the square root of two is irrational",
+    "Write a short poem about autumn rain",
+    "Why does my Docker container exit immediately?",
+    "Describe the causes of the First World War",
+    "Tell me a joke about cats",
+    "Explain how vaccines train the immune system",
+    "Optimize this SQL query that joins three large tables",
+    "Plan a three-day trip to Kyoto on a budget",
+    "What is the derivative of ln(x) / x?",
+    "Help me name my new bakery",
+    "Research the impact of social media on teenage sleep",
+    "Convert this JavaScript callback code to async/await",
+    "How did the industrial revolution change cities?",
+]
+
+_CODE_KW    = {"code","python","javascript","function","bug","api","sql","html","css","def ","const ","git","react","node","docker","typescript","golang","rust","java","php","c++"}
+_MATH_KW    = {"math","equation","calculus","algebra","integral","formula","statistics","matrix","derivative","proof"}
+_SCI_KW     = {"science","physics","chemistry","biology","quantum","genetics","molecule","atom"}
+_WRITE_KW   = {"write","essay","story","poem","email","letter","blog","creative","fiction","paragraph"}
+_ANALYZE_KW = {"analyze","compare","evaluate","research","investigate","assess","explain"}
+_HIST_KW    = {"history","historical","war","ancient","civilization","revolution","century"}
+
+def legacy_detect_topic(text: str) -> str:
+    t = text.lower()
+    if any(w in t for w in _CODE_KW):    return "code"
+    if any(w in t for w in _MATH_KW):    return "math"
+    if any(w in t for w in _SCI_KW):     return "science"
+    if any(w in t for w in _WRITE_KW):   return "writing"
+    if any(w in t for w in _ANALYZE_KW): return "analysis"
+    if any(w in t for w in _HIST_KW):    return "history"
+    return "general"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=200, help="passes over the corpus")
+    ap.add_argument("--corpus", help="file with one prompt per line")
+    args = ap.parse_args()
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [l.strip() for l in f if l.strip()]
+
+    def run_legacy():
+        for p in corpus:
+            legacy_detect_topic(p)
+
+    def run_label():
+        for p in corpus:
+            detect_topic(p)
+
+    def run_new():
+        for p in corpus:
+            s = topic_scores(p)
+            detect_topic(p, s)
+            get_refs(p, s)
+
+    per = len(corpus) * args.n
+    old_us = min(timeit.repeat(run_legacy, number=args.n, repeat=5)) / per * 1e6
+    lbl_us = min(timeit.repeat(run_label, number=args.n, repeat=5)) / per * 1e6
+    new_us = min(timeit.repeat(run_new, number=args.n, repeat=5)) / per * 1e6
+    print(f"{len(corpus)} prompts × {args.n} passes")
+    print(f"legacy substring scan      {old_us:8.2f} µs/prompt  (label only)")
+    print(f"precompiled matcher        {lbl_us:8.2f} µs/prompt  (label only)")
+    print(f"precompiled matcher        {new_us:8.2f} µs/prompt  (all scores + label + refs)")
+
+    diffs = [(p, legacy_detect_topic(p), detect_topic(p)) for p in corpus]
+    diffs = [d for d in diffs if d[1] != d[2]]
+    if diffs:
+        print(f"\n{len(diffs)} prompts labelled differently (legacy -> new):")
+        for p, old, new in diffs:
+            print(f"  {old:>8} -> {new:<8}  {p}")
+
+if __name__ == "__main__":
+    main()
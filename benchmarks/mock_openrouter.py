@@ -0,0 +1,171 @@
+"""Local OpenAI-compatible stand-in for OpenRouter, for offline benchmarks.
+
+    python benchmarks/mock_openrouter.py --port 8787 --ttft 0.4 --tps 60 --chunk-tokens 3
+    OPENROUTER_BASE_URL=http://127.0.0.1:8787/v1 streamlit run app.py
+
+Replies are `--reply-tokens` words of lorem-style filler, streamed as SSE after
+`--ttft` seconds at `--tps` words per second. `--model-ttft ID=SECONDS` slows a
+single model down and `--fail-rate` answers a share of requests with
+`--fail-status` (429 by default). `--cut-rate` drops a share of streams
+halfway through, without the closing chunk, like a connection reset.
+
+Prompt prefixes are cached per model like a provider-side prompt cache: usage
+reports `cached_tokens` for the longest run of leading messages seen before,
+and with `--prefill-tps` only the uncached prompt tokens add to the TTFT.
+"""
+import argparse, hashlib, json, random, sys, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the quick brown fox jumps over a lazy dog while streaming tokens arrive in "
+         "small chunks from a local mock server built for repeatable benchmarks").split()
+
+def reply_words(n: int, seed: str) -> list:
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        w = rnd.choice(WORDS)
+        out.append(w + ("\n\n" if i % 40 == 39 else " "))
+    return out
+
+def text_of(content) -> str:
+    if isinstance(content, list):   # content parts, e.g. with cache_control hints
+        return " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return str(content or "")
+
+PREFIXES = set()
+
+def prefix_cache(model: str, messages: list) -> tuple:
+    """(prompt tokens, tokens covered by the longest previously seen message prefix)."""
+    h, total, cached = hashlib.sha1(model.encode()), 0, 0
+    for m in messages:
+        text = text_of(m.get("content"))
+        h.update(json.dumps([m.get("role"), text]).encode())
+        total += len(text.split())
+        if h.hexdigest() in PREFIXES and cached == total - len(text.split()):
+            cached = total
+        PREFIXES.add(h.hexdigest())
+    return total, cached
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    opts = None
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, code: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            models = [{"id": m, "name": m, "context_length": 32768, "pricing": {"prompt": "0", "completion": "0"}}
+                      for m in self.opts.models]
+            etag   = '"' + hashlib.sha1(json.dumps(models).encode()).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._json(304, None, {"ETag": etag})
+            return self._json(200, {"data": models}, {"ETag": etag})
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+        o     = self.opts
+        model = body.get("model", "mock")
+        if o.fail_rate and random.random() < o.fail_rate:
+            return self._json(o.fail_status, {"error": {"message": f"mock failure ({o.fail_status})",
+                                                        "code": o.fail_status}},
+                              {"Retry-After": "1"} if o.fail_status == 429 else None)
+        ttft  = o.model_ttft.get(model, o.ttft)
+        words = reply_words(o.reply_tokens, json.dumps(body.get("messages", []))[-64:])
+        rid   = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        prompt, cached = prefix_cache(model, body.get("messages", []))
+        usage = {"prompt_tokens": prompt, "completion_tokens": len(words), "total_tokens": prompt + len(words),
+                 "prompt_tokens_details": {"cached_tokens": cached}}
+        if o.prefill_tps:
+            ttft += (prompt - cached) / o.prefill_tps
+        time.sleep(ttft)
+
+        if not body.get("stream"):
+            time.sleep(len(words) / o.tps)
+            return self._json(200, {
+                "id": rid, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(words)}}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta: dict, finish=None, **extra):
+            msg = {"id": rid, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                   "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+            self._chunk(f"data: {json.dumps(msg)}\n\n".encode())
+
+        cut = len(words) // 2 if o.cut_rate and random.random() < o.cut_rate else None
+        try:
+            event({"role": "assistant", "content": ""})
+            step = o.chunk_tokens / o.tps
+            for i in range(0, len(words), o.chunk_tokens):
+                if cut is not None and i >= cut:
+                    self.close_connection = True
+                    return
+                event({"content": "".join(words[i:i + o.chunk_tokens])})
+                time.sleep(step)
+            event({}, "stop", usage=usage)
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        except ConnectionError:
+            self.close_connection = True
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--ttft", type=float, default=0.3, help="seconds before the first token")
+    ap.add_argument("--tps", type=float, default=80.0, help="tokens (words) per second")
+    ap.add_argument("--chunk-tokens", type=int, default=3, help="tokens per SSE chunk")
+    ap.add_argument("--reply-tokens", type=int, default=300, help="tokens per reply")
+    ap.add_argument("--prefill-tps", type=float, default=0.0,
+                    help="uncached prompt tokens processed per second before the first token (0: free)")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of requests that fail")
+    ap.add_argument("--fail-status", type=int, default=429)
+    ap.add_argument("--cut-rate", type=float, default=0.0, help="share of streams dropped halfway")
+    ap.add_argument("--model-ttft", action="append", default=[], metavar="ID=SECONDS",
+                    help="per-model time to first token (repeatable)")
+    ap.add_argument("--models", nargs="*", default=[], help="ids listed by GET /v1/models")
+    o = ap.parse_args(argv)
+    o.model_ttft = {k: float(v) for k, v in (x.split("=", 1) for x in o.model_ttft)}
+    return o
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is expected, not an error.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def serve(opts) -> ThreadingHTTPServer:
+    handler = type("MockHandler", (Handler,), {"opts": opts})
+    srv = Server((opts.host, opts.port), handler)
+    srv.daemon_threads = True
+    return srv
+
+if __name__ == "__main__":
+    opts = parse_args()
+    print(f"mock OpenRouter on http://{opts.host}:{opts.port}/v1", flush=True)
+    serve(opts).serve_forever()
@@ -0,0 +1 @@
+# Lets a bare `pytest` from the repo root import the neurachat package.
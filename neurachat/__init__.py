@@ -0,0 +1 @@
+"""NeuraChat AI — engine modules shared by the Streamlit app."""
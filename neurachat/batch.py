@@ -0,0 +1,167 @@
+"""Batch runner — push a JSONL file of prompts through the fallback router.
+
+    OPENROUTER_API_KEY=sk-or-... python -m neurachat.batch prompts.jsonl -o results.jsonl -c 8
+
+Each input line is {"prompt": "..."} or {"messages": [...]}, optionally with
+"id", "model", "style", "tone", "temperature", "max_tokens", "hedge" and
+"ctx_budget" (the same fields the headless proxy accepts); the CLI flags are
+the defaults. Results are appended to the output as they finish, one JSON
+line per item with the reply, the model that answered and its latency.
+
+Re-running with the same output resumes: completed items are skipped, failed
+ones are retried, and a line torn by a crash is dropped.
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .catalog import make_catalog
+from .client import BASE_URL, make_client, make_pool
+from .router import Router, make_cache, make_health, make_limiter, make_metrics
+from .server import ProxyError, parse_request
+
+def read_items(path: str) -> list:
+    """[(id, request body)] from a JSONL file; ids default to the 1-based line number."""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                body = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"{path}:{n}: not valid JSON ({e})") from None
+            if isinstance(body, str):
+                body = {"prompt": body}
+            elif not isinstance(body, dict):
+                raise SystemExit(f"{path}:{n}: expected a JSON object or string, got {type(body).__name__}")
+            items.append((body.pop("id", n), body))
+    return items
+
+def load_done(path: str) -> dict:
+    """Completed results already in `path`, by id. Failed and torn lines are
+    dropped and the file is rewritten without them, so retries don't duplicate."""
+    if not os.path.exists(path):
+        return {}
+    done, dirty = {}, False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                dirty = True
+                continue
+            if rec.get("error") or not line.endswith("\n"):
+                dirty = True
+                continue
+            done[json.dumps(rec["id"])] = rec
+    if dirty:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in done.values())
+        os.replace(tmp, path)
+    return done
+
+def run_one(router: Router, item_id, body: dict, defaults: dict, catalog=None) -> dict:
+    # Never raises: anything unexpected becomes an error record that the next
+    # run retries, instead of aborting the rest of the batch.
+    rec, t0 = {"id": item_id}, time.monotonic()
+    info, parts, ttft = {}, [], None
+    try:
+        if "messages" not in body:
+            body = {**body, "messages": [{"role": "user", "content": body.get("prompt")}]}
+        req = parse_request({**defaults, **body}, catalog)
+        for text in router.stream(info=info, **req):
+            if ttft is None:
+                ttft = time.monotonic() - t0
+            parts.append(text)
+    except ProxyError as e:
+        return {**rec, "error": "invalid", "detail": str(e)}
+    except Exception as e:
+        return {**rec, "error": "unexpected", "detail": f"{type(e).__name__}: {e}"}
+    rec.update(model=info.get("model"), reply="".join(parts),
+               latency_s=round(time.monotonic() - t0, 3), ttft_s=round(ttft or 0.0, 3))
+    for k in ("cached", "coalesced", "trimmed", "resumed"):
+        if info.get(k):
+            rec[k] = info[k]
+    if info.get("error"):
+        rec["error"] = info["error"]
+    return rec
+
+def run(router: Router, items: list, out_path: str, concurrency: int = 8, defaults: dict | None = None,
+        progress=None, catalog=None) -> dict:
+    """Run `items` not yet in `out_path`, appending each result as it completes.
+    Returns counts: {"skipped", "ok", "failed"}."""
+    done    = load_done(out_path)
+    pending = [(i, b) for i, b in items if json.dumps(i) not in done]
+    counts  = {"skipped": len(items) - len(pending), "ok": 0, "failed": 0}
+    todo    = iter(pending)
+    with open(out_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(concurrency) as ex:
+        # Keep only `concurrency` items submitted so thousands of prompts don't
+        # all queue up front (and Ctrl-C leaves nothing half-scheduled).
+        running = set()
+        while True:
+            for item_id, body in todo:
+                running.add(ex.submit(run_one, router, item_id, body, defaults or {}, catalog))
+                if len(running) >= concurrency:
+                    break
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                rec = fut.result()
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["failed" if rec.get("error") else "ok"] += 1
+                if progress:
+                    progress(counts, len(pending))
+    return counts
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("input", help="JSONL file of prompts")
+    ap.add_argument("-o", "--output", help="results JSONL (default: <input>.results.jsonl)")
+    ap.add_argument("-c", "--concurrency", type=int, default=8)
+    ap.add_argument("--model", default="auto", help="model id or label (default: first free model)")
+    ap.add_argument("--style", default="Balanced")
+    ap.add_argument("--tone", default="Professional")
+    ap.add_argument("--temperature", type=float, default=0.7)
+    ap.add_argument("--max-tokens", type=int, default=2048)
+    ap.add_argument("--max-wait", type=float, default=30.0,
+                    help="seconds an item may wait on the rate limiter before falling through")
+    ap.add_argument("--base-url", default=BASE_URL)
+    args = ap.parse_args(argv)
+
+    key = os.getenv("OPENROUTER_API_KEY", "")
+    if not key:
+        ap.error("OPENROUTER_API_KEY is not set")
+    items = read_items(args.input)
+    out   = args.output or os.path.splitext(args.input)[0] + ".results.jsonl"
+
+    pool    = make_pool()
+    pool.prewarm(args.base_url)
+    limiter = make_limiter()
+    limiter.max_wait = args.max_wait      # a batch would rather wait than fail
+    catalog = make_catalog(pool.client, args.base_url)
+    router  = Router(make_client(key, base_url=args.base_url, pool=pool), catalog, make_health(),
+                     make_cache(), make_metrics(), limiter)
+    defaults = {"model": args.model, "style": args.style, "tone": args.tone,
+                "temperature": args.temperature, "max_tokens": args.max_tokens}
+    t0 = time.monotonic()
+
+    def progress(c, total):
+        n = c["ok"] + c["failed"]
+        if n == total or n % 25 == 0:
+            rate = n / max(time.monotonic() - t0, 1e-9)
+            print(f"\r{n}/{total} done, {c['failed']} failed, {rate:.1f}/s", end="", file=sys.stderr, flush=True)
+
+    try:
+        c = run(router, items, out, args.concurrency, defaults, progress, catalog)
+    except KeyboardInterrupt:
+        print("\ninterrupted; re-run the same command to resume", file=sys.stderr)
+        sys.exit(130)
+    print(f"\n{c['ok']} ok, {c['failed']} failed, {c['skipped']} already done -> {out}", file=sys.stderr)
+    sys.exit(1 if c["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
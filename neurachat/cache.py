@@ -0,0 +1,124 @@
+"""Response cache — in-memory LRU tier with an optional SQLite tier."""
+from __future__ import annotations
+import hashlib, sqlite3, threading, time
+from collections import OrderedDict
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  KEYS
+# ─────────────────────────────────────────────────────────────────────────────
+def chain_hash(prev: str, role: str, content: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(prev.encode())
+    h.update(b"\x1e" + role.encode() + b"\x1f")
+    h.update(content.encode("utf-8"))
+    return h.hexdigest()
+
+def history_hash(messages: list) -> str:
+    # Each message memoizes its link of the chain in "_h". History is append-only,
+    # so only the messages added since the last call are hashed — O(1) per turn.
+    i = len(messages)
+    while i and "_h" not in messages[i - 1]:
+        i -= 1
+    prev = messages[i - 1]["_h"] if i else ""
+    for m in messages[i:]:
+        prev = m["_h"] = chain_hash(prev, m["role"], m["content"])
+    return prev
+
+def make_key(model: str, system: str, history: str, temperature: float, max_tokens: int) -> str:
+    raw = f"{model}\x1f{system}\x1f{history}\x1f{temperature:.3f}\x1f{max_tokens}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=20).hexdigest()
+
+def replay(text: str, size: int = 24):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  CACHE
+# ─────────────────────────────────────────────────────────────────────────────
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, max_bytes: int = 8 << 20, ttl: float = 3600.0,
+                 path: str | None = None, disk_max_bytes: int = 64 << 20):
+        self.max_entries    = max_entries
+        self.max_bytes      = max_bytes
+        self.ttl            = ttl
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = self.misses = 0
+        self._lru   = OrderedDict()   # key -> (expires, text)
+        self._bytes = 0
+        self._lock  = threading.Lock()
+        self._db    = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires REAL NOT NULL, atime REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_atime ON responses(atime)")
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit and hit[0] > now:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return hit[1]
+            if hit:
+                self._drop(key)
+            if self._db:
+                row = self._db.execute("SELECT text, expires FROM responses WHERE key=?", (key,)).fetchone()
+                if row and row[1] > now:
+                    self._db.execute("UPDATE responses SET atime=? WHERE key=?", (now, key))
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM responses WHERE key=?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        if not text or size > self.max_bytes:
+            return
+        now = time.time()
+        expires = now + self.ttl
+        with self._lock:
+            self._remember(key, text, expires)
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, text, size, expires, atime) VALUES (?,?,?,?,?)",
+                    (key, text, size, expires, now),
+                )
+                self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+                total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.disk_max_bytes:
+                    for k, s in self._db.execute("SELECT key, size FROM responses ORDER BY atime").fetchall():
+                        if total <= self.disk_max_bytes:
+                            break
+                        self._db.execute("DELETE FROM responses WHERE key=?", (k,))
+                        total -= s
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
+            if self._db:
+                self._db.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def _remember(self, key: str, text: str, expires: float):
+        if key in self._lru:
+            self._drop(key)
+        self._lru[key] = (expires, text)
+        self._bytes += len(text.encode("utf-8"))
+        while self._lru and (len(self._lru) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._lru)))
+
+    def _drop(self, key: str):
+        _, text = self._lru.pop(key)
+        self._bytes -= len(text.encode("utf-8"))
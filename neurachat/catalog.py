@@ -0,0 +1,189 @@
+"""Model catalog — the free models OpenRouter currently lists, cached on disk.
+
+Starts from the disk cache (or the built-in FREE_MODELS) so startup never waits
+on the network, then refreshes in the background with conditional requests
+(ETag / If-Modified-Since). Retired models drop out of the picker and the
+fallback chain; newly listed free models are added after the curated ones.
+
+The catalog is a read-only mapping of model id -> context window. Iterating it
+yields the fallback chain, in order; lookups cover every listed model.
+"""
+from __future__ import annotations
+import json, os, threading, time
+from collections.abc import Mapping
+
+from .client import BASE_URL
+from .context import DEFAULT_WINDOW
+from .models import FREE_MODELS
+
+def _price(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+def parse_listing(data: list) -> list:
+    """[{id, name, ctx, prompt, completion}] for the free models in a /models listing."""
+    out = []
+    for m in data:
+        if not isinstance(m, dict) or not m.get("id"):
+            continue
+        pricing = m.get("pricing") or {}
+        prompt, completion = _price(pricing.get("prompt")), _price(pricing.get("completion"))
+        if not (m["id"].endswith(":free") or (prompt == 0 and completion == 0 and pricing)):
+            continue
+        ctx = m.get("context_length") or (m.get("top_provider") or {}).get("context_length") or DEFAULT_WINDOW
+        out.append({"id": m["id"], "name": m.get("name") or m["id"], "ctx": int(ctx),
+                    "prompt": prompt, "completion": completion})
+    return out
+
+class ModelCatalog(Mapping):
+    def __init__(self, seed: list = FREE_MODELS, path: str | None = None, chain: int = 0):
+        self.seed    = seed                 # curated (label, id, ctx); keeps its labels and order
+        self.path    = path
+        self.chain   = chain or len(seed)   # fallback chain length
+        self.etag    = None
+        self.modified = None
+        self.fetched = 0.0                  # wall clock of the last 200/304, 0 = never
+        self.source  = "built-in"
+        self.error   = None
+        self._lock   = threading.Lock()
+        self._build([{"id": mid, "name": label, "ctx": ctx, "prompt": 0.0, "completion": 0.0}
+                     for label, mid, ctx in seed])
+        if path:
+            self._load()
+
+    def _build(self, listing: list):
+        # One immutable snapshot, swapped in whole, so readers never lock.
+        curated = {mid: label for label, mid, _ in self.seed}
+        by_id   = {m["id"]: m for m in listing}
+        known   = [mid for _, mid, _ in self.seed if mid in by_id]
+        extra   = sorted((mid for mid in by_id if mid not in curated), key=lambda mid: -by_id[mid]["ctx"])
+        labels, models = set(), []
+        for mid in known + sorted(extra, key=lambda mid: by_id[mid]["name"].lower()):
+            label = curated.get(mid) or "✨ " + by_id[mid]["name"].replace(" (free)", "")
+            if label in labels:
+                label = f"{label} · {mid}"
+            labels.add(label)
+            models.append((label, mid, by_id[mid]["ctx"]))
+        order = known + extra
+        self._snap = {
+            "models":  models,
+            "ids":     {label: mid for label, mid, _ in models},
+            "ctx":     {mid: by_id[mid]["ctx"] for mid in by_id},
+            "chain":   {mid: by_id[mid]["ctx"] for mid in order[:self.chain]},
+            "pricing": {mid: (by_id[mid]["prompt"], by_id[mid]["completion"]) for mid in by_id},
+        }
+
+    # Mapping over the fallback chain (what Router iterates); lookups see every model.
+    def __getitem__(self, mid: str) -> int:
+        return self._snap["ctx"][mid]
+
+    def __iter__(self):
+        return iter(list(self._snap["chain"]))
+
+    def __len__(self) -> int:
+        return len(self._snap["chain"])
+
+    def __contains__(self, mid) -> bool:
+        return mid in self._snap["ctx"]
+
+    def values(self) -> list:
+        return list(self._snap["chain"].values())
+
+    @property
+    def models(self) -> list:
+        """Every selectable (label, id, ctx), curated models first."""
+        return self._snap["models"]
+
+    @property
+    def ids(self) -> dict:
+        return self._snap["ids"]
+
+    def names(self) -> list:
+        return [label for label, _, _ in self._snap["models"]]
+
+    def pricing(self, mid: str) -> tuple:
+        """(prompt, completion) USD per token; (0, 0) for free or unknown models."""
+        return self._snap["pricing"].get(mid, (0.0, 0.0))
+
+    def _load(self):
+        # A missing, stale-format or hand-edited cache must never break startup:
+        # entries get the same defaults as a listing, and anything else that is
+        # off leaves the built-in seed in place.
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                d = json.load(f)
+            listing = [{"id": m["id"], "name": str(m.get("name") or m["id"]),
+                        "ctx": int(m.get("ctx") or DEFAULT_WINDOW),
+                        "prompt": _price(m.get("prompt")), "completion": _price(m.get("completion"))}
+                       for m in d["models"] if isinstance(m, dict) and isinstance(m.get("id"), str) and m["id"]]
+            if not listing:
+                return
+            self._build(listing)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        self.etag, self.modified, self.fetched = d.get("etag"), d.get("modified"), _price(d.get("fetched"))
+        self.source = "disk"
+
+    def _save(self, listing: list):
+        if not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"etag": self.etag, "modified": self.modified, "fetched": self.fetched,
+                           "models": listing}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # read-only deploys still get the in-memory catalog
+
+    def refresh(self, http, base_url: str = BASE_URL) -> bool:
+        """One conditional GET of /models through `http` (an httpx client).
+        Returns True when the catalog changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.modified:
+            headers["If-Modified-Since"] = self.modified
+        try:
+            r = http.get(base_url.rstrip("/") + "/models", headers=headers, timeout=15)
+            if r.status_code == 304:
+                self.fetched, self.error = time.time(), None
+                return False
+            r.raise_for_status()
+            listing = parse_listing(r.json().get("data") or [])
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            return False
+        if not listing:
+            # An empty listing is far likelier an upstream hiccup than every
+            # free model being retired at once.
+            self.error = "listing had no free models"
+            return False
+        with self._lock:
+            self.etag     = r.headers.get("etag")
+            self.modified = r.headers.get("last-modified")
+            self.fetched, self.error, self.source = time.time(), None, "network"
+            self._build(listing)
+            self._save(listing)
+        return True
+
+    def start(self, http, base_url: str = BASE_URL, every: float = 3600.0) -> threading.Thread:
+        """Refresh now and then every `every` seconds, from a daemon thread."""
+        def loop():
+            while True:
+                self.refresh(http, base_url)
+                time.sleep(max(every, 60.0))
+
+        t = threading.Thread(target=loop, daemon=True, name="nc-catalog")
+        t.start()
+        return t
+
+def make_catalog(http=None, base_url: str = BASE_URL) -> ModelCatalog:
+    cat = ModelCatalog(path=os.getenv("NEURACHAT_CATALOG_CACHE", "neurachat_models.json") or None,
+                       chain=int(os.getenv("NEURACHAT_CATALOG_CHAIN", "0")))
+    every = float(os.getenv("NEURACHAT_CATALOG_REFRESH", "3600"))
+    if http is not None and every > 0:
+        cat.start(http, base_url, every)
+    return cat
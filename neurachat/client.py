@@ -0,0 +1,145 @@
+"""OpenRouter client construction — tuned HTTP pool, pre-warm, saturation stats."""
+from __future__ import annotations
+import importlib.util, os, threading, time
+
+try:
+    import httpx
+except ImportError:  # recent openai SDKs depend on the httpx2 fork instead
+    import httpx2 as httpx
+
+BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]").
+HAS_H2   = importlib.util.find_spec("h2") is not None
+
+class PoolStats:
+    # Requests are counted from send until their response body is closed, which
+    # for streamed replies is the whole generation.
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak      = 0
+        self.requests  = 0
+        self.saturated = 0          # requests sent while every connection was busy
+        self._lock     = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.requests += 1
+            if self.in_flight >= self.max_connections:
+                self.saturated += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+class _TrackedStream(httpx.SyncByteStream):
+    def __init__(self, stream, stats: PoolStats):
+        self._stream = stream
+        self._stats  = stats
+        self._open   = True
+        self._tail   = b""
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._tail = chunk[-32:]
+            yield chunk
+
+    def close(self):
+        try:
+            # The SDK stops reading at "data: [DONE]" and closes, leaving the
+            # chunked terminator unread, which makes the pool drop the connection.
+            # Only that terminator is left, so read it and keep the connection.
+            if self._tail.rstrip().endswith(b"[DONE]"):
+                for _ in self._stream:
+                    pass
+            self._stream.close()
+        finally:
+            if self._open:
+                self._open = False
+                self._stats.end()
+
+class TrackedTransport(httpx.HTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request):
+        self.stats.start()
+        try:
+            resp = super().handle_request(request)
+        except BaseException:
+            self.stats.end()
+            raise
+        resp.stream = _TrackedStream(resp.stream, self.stats)
+        return resp
+
+    def connections(self) -> tuple:
+        """(open, idle) connections in the pool, if the transport exposes them."""
+        conns = getattr(getattr(self, "_pool", None), "connections", None) or []
+        try:
+            return len(conns), sum(1 for c in conns if c.is_idle())
+        except Exception:
+            return len(conns), 0
+
+class HttpPool:
+    """One pooled HTTP client shared by every OpenAI client built on it."""
+    def __init__(self, max_connections: int = 64, max_keepalive: int = 32, keepalive_expiry: float = 90.0,
+                 http2: bool = False, connect_timeout: float = 10.0, timeout: float = 45.0):
+        self.http2     = http2 and HAS_H2
+        self.stats     = PoolStats(max_connections)
+        self.transport = TrackedTransport(
+            self.stats,
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=keepalive_expiry),
+        )
+        self.client    = httpx.Client(transport=self.transport, follow_redirects=True,
+                                      timeout=httpx.Timeout(timeout, connect=connect_timeout))
+        self.warm_ms   = None
+
+    def prewarm(self, base_url: str = BASE_URL, every: float = 0.0) -> threading.Thread:
+        """Open a connection (DNS, TCP, TLS) in the background so the first chat
+        request doesn't pay for it. With `every`, repeat while the pool is idle so
+        keep-alive connections survive quiet periods."""
+        url = base_url.rstrip("/") + "/models"
+
+        def warm():
+            while True:
+                if self.stats.in_flight == 0:
+                    t0 = time.monotonic()
+                    try:
+                        self.client.get(url).close()
+                        self.warm_ms = (time.monotonic() - t0) * 1000
+                    except httpx.HTTPError:
+                        pass
+                if every <= 0:
+                    return
+                time.sleep(every)
+
+        t = threading.Thread(target=warm, daemon=True, name="nc-http-prewarm")
+        t.start()
+        return t
+
+    def snapshot(self) -> dict:
+        open_, idle = self.transport.connections()
+        s = self.stats
+        return {"in_flight": s.in_flight, "peak": s.peak, "max": s.max_connections, "requests": s.requests,
+                "saturated": s.saturated, "open": open_, "idle": idle, "http2": self.http2,
+                "warm_ms": self.warm_ms}
+
+def make_pool() -> HttpPool:
+    return HttpPool(
+        max_connections=int(os.getenv("NEURACHAT_HTTP_MAX_CONNECTIONS", "64")),
+        max_keepalive=int(os.getenv("NEURACHAT_HTTP_MAX_KEEPALIVE", "32")),
+        keepalive_expiry=float(os.getenv("NEURACHAT_HTTP_KEEPALIVE", "90")),
+        http2=os.getenv("NEURACHAT_HTTP2", "0") == "1",
+    )
+
+def make_client(api_key: str, base_url: str = BASE_URL, timeout: float = 45.0,
+                pool: HttpPool | None = None):
+    # The SDK (~0.6 s of imports) loads with the first client, not the app.
+    from openai import OpenAI
+    return OpenAI(base_url=base_url, api_key=api_key, timeout=timeout,
+                  http_client=pool.client if pool else None)
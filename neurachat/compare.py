@@ -0,0 +1,82 @@
+"""Compare mode — one prompt streamed from several models at once.
+
+Each model runs through `Router.stream(fallback=False)` on its own worker
+thread; `fan_in()` merges their chunks into one stream of (lane, text) events
+for the script thread, so wall time is the slowest model, not the sum.
+"""
+from __future__ import annotations
+import queue, threading, time
+
+from .tokens import heuristic_tokens
+
+class Lane:
+    # One model's column: its reply so far and live timing.
+    def __init__(self, model: str):
+        self.model = model
+        self.parts = []
+        self.info  = {}
+        self.t0    = time.monotonic()
+        self.ttft  = None
+        self.t_end = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def done(self) -> bool:
+        return self.t_end is not None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.t_end or time.monotonic()) - self.t0
+
+    @property
+    def tps(self) -> float:
+        # Output tokens per second after the first token; estimated while streaming.
+        gen = self.elapsed - (self.ttft or 0.0)
+        return heuristic_tokens(self.text) / gen if self.ttft is not None and gen > 0 else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.done and bool(self.parts) and not self.info.get("error")
+
+def fan_in(router, models: list, messages: list, system: str, temperature: float, max_tokens: int,
+           ctx_budget: int = 8192, lanes: list | None = None):
+    """Stream `models` concurrently; yield (lane, text) per chunk and (lane, None)
+    when a lane finishes. Closing the generator cancels every lane still running."""
+    lanes = lanes if lanes is not None else [Lane(m) for m in models]
+    q     = queue.Queue()
+    stop  = threading.Event()
+
+    def pump(lane: Lane):
+        chunks = router.stream(messages, lane.model, system, temperature, max_tokens,
+                               ctx_budget=ctx_budget, info=lane.info, fallback=False)
+        try:
+            for text in chunks:
+                if stop.is_set():
+                    return
+                q.put((lane, text))
+        except Exception as e:  # never leave the script thread waiting on a dead lane
+            lane.info["error"] = "unexpected"
+            q.put((lane, f"\n\n**⚠️ {type(e).__name__}:** {e}"))
+        finally:
+            chunks.close()
+            q.put((lane, None))
+
+    for lane in lanes:
+        threading.Thread(target=pump, args=(lane,), daemon=True, name=f"nc-compare-{lane.model}").start()
+    running = len(lanes)
+    try:
+        while running:
+            lane, text = q.get()
+            if text is None:
+                lane.t_end = time.monotonic()
+                running -= 1
+            else:
+                if lane.ttft is None:
+                    lane.ttft = time.monotonic() - lane.t0
+                lane.parts.append(text)
+            yield lane, text
+    finally:
+        stop.set()
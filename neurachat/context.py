@@ -0,0 +1,35 @@
+"""Context window management — fit the history sent upstream into a token budget."""
+from .tokens import message_tokens
+
+DEFAULT_WINDOW = 32768   # assumed when a model's context length is unknown
+MSG_OVERHEAD   = 4       # role/separator tokens added per chat message
+REPLY_MARGIN   = 256     # slack between prompt + max_tokens and the hard window
+
+def context_budget(windows: list, max_tokens: int, budget: int) -> int:
+    # The request may land on any model in the fallback chain, so the smallest
+    # window wins. `budget` is the user's own cap on prompt size.
+    caps = [(w or DEFAULT_WINDOW) - max_tokens - REPLY_MARGIN for w in windows]
+    return max(0, min([budget] + caps))
+
+def fit(messages: list, budget: int, count=message_tokens, step: int = 1) -> int:
+    """Return the index of the first message to send so the tail fits in `budget`.
+
+    The newest message is always kept. Older messages are dropped oldest-first,
+    whole turns at a time, so the kept history always starts with a user message.
+    With `step`, the cut only moves in multiples of `step` messages, so the same
+    start (and byte-identical prompt prefix) is kept for several turns.
+    """
+    if not messages:
+        return 0
+    start = len(messages) - 1
+    total = count(messages[start]) + MSG_OVERHEAD
+    while start > 0:
+        total += count(messages[start - 1]) + MSG_OVERHEAD
+        if total > budget:
+            break
+        start -= 1
+    if start and step > 1:
+        start = min(-(-start // step) * step, len(messages) - 1)
+    while start < len(messages) - 1 and messages[start]["role"] != "user":
+        start += 1
+    return start
@@ -0,0 +1,168 @@
+"""Conversation exports — built on demand, memoized per conversation."""
+from __future__ import annotations
+import datetime, importlib.util, io, re, threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# fpdf and python-docx cost ~0.3 s to import and most sessions never export, so
+# availability is checked without importing; the builders import on first use.
+HAS_PDF  = importlib.util.find_spec("fpdf") is not None
+HAS_DOCX = importlib.util.find_spec("docx") is not None
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  EXPORT HELPERS
+# ─────────────────────────────────────────────────────────────────────────────
+def export_txt(messages: list, model: str) -> bytes:
+    lines = [
+        "NeuraChat AI — Conversation Export",
+        f"Date  : {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        f"Model : {model}",
+        "═" * 60, "",
+    ]
+    for m in messages:
+        lines += [f"[{'You' if m['role'] == 'user' else 'NeuraChat AI'}]", m["content"], ""]
+    return "\n".join(lines).encode("utf-8")
+
+def export_md(messages: list, model: str) -> bytes:
+    lines = ["# NeuraChat AI — Conversation Export",
+             f"*{datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}*  ·  Model: `{model}`", ""]
+    for m in messages:
+        role = "**You**" if m["role"] == "user" else "**NeuraChat AI**"
+        lines += [f"### {role}", m["content"], "---", ""]
+    return "\n".join(lines).encode("utf-8")
+
+def export_pdf(messages: list, model: str) -> bytes:
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_font("Helvetica", "B", 16)
+            self.set_text_color(109, 113, 240)
+            self.cell(0, 10, "NeuraChat AI", ln=False, align="C")
+            self.ln(7)
+            self.set_font("Helvetica", "", 8)
+            self.set_text_color(140, 145, 170)
+            self.cell(0, 5, f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}  ·  {model}", ln=True, align="C")
+            self.ln(3)
+            self.set_draw_color(109, 113, 240)
+            self.set_line_width(0.4)
+            self.line(10, self.get_y(), self.w - 10, self.get_y())
+            self.ln(5)
+        def footer(self):
+            self.set_y(-12)
+            self.set_font("Helvetica", "I", 7)
+            self.set_text_color(150, 150, 170)
+            self.cell(0, 8, f"Page {self.page_no()} — NeuraChat AI", align="C")
+
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=20)
+    pdf.add_page()
+    for m in messages:
+        is_user = m["role"] == "user"
+        pdf.set_font("Helvetica", "B", 10)
+        if is_user:
+            pdf.set_text_color(60, 80, 220)
+            pdf.set_fill_color(240, 242, 255)
+        else:
+            pdf.set_text_color(109, 113, 240)
+            pdf.set_fill_color(245, 245, 255)
+        pdf.set_draw_color(200, 205, 250)
+        pdf.set_line_width(0.2)
+        pdf.rect(10, pdf.get_y(), pdf.w - 20, 8, "DF")
+        pdf.set_xy(10, pdf.get_y() + 1.5)
+        pdf.cell(pdf.w - 20, 5, "  YOU" if is_user else "  NEURACHAT AI", ln=True)
+        pdf.ln(2)
+        pdf.set_font("Helvetica", "", 9.5)
+        pdf.set_text_color(30, 34, 60)
+        clean = re.sub(r"```[\w]*\n?", "", m["content"])
+        clean = re.sub(r"[`*#_\[\]>]+", "", clean)
+        clean = re.sub(r"\n{3,}", "\n\n", clean.strip())
+        safe = "".join(c if c.encode("latin-1", errors="ignore") else "?" for c in clean)
+        pdf.multi_cell(0, 5.6, safe, border=0)
+        pdf.ln(4)
+        pdf.set_draw_color(220, 222, 235)
+        pdf.line(10, pdf.get_y(), pdf.w - 10, pdf.get_y())
+        pdf.ln(5)
+    return bytes(pdf.output())
+
+def export_docx(messages: list, model: str) -> bytes:
+    from docx import Document as DocxDocument
+    from docx.shared import Pt, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    doc = DocxDocument()
+    h = doc.add_heading("NeuraChat AI — Conversation Export", 0)
+    h.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in h.runs:
+        run.font.color.rgb = RGBColor(109, 113, 240)
+    sub = doc.add_paragraph(f"Exported: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}  ·  Model: {model}")
+    sub.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    if sub.runs:
+        sub.runs[0].font.size = Pt(9)
+        sub.runs[0].font.color.rgb = RGBColor(130, 130, 150)
+    doc.add_paragraph()
+    for m in messages:
+        is_user = m["role"] == "user"
+        p = doc.add_paragraph()
+        rr = p.add_run(f"[{'You' if is_user else 'NeuraChat AI'}]")
+        rr.bold = True
+        rr.font.size = Pt(10)
+        rr.font.color.rgb = RGBColor(50, 50, 80) if is_user else RGBColor(109, 113, 240)
+        clean = re.sub(r"[`*#_]+", "", m["content"])
+        dp = doc.add_paragraph(clean)
+        if dp.runs:
+            dp.runs[0].font.size = Pt(10)
+        doc.add_paragraph()
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  ON-DEMAND EXPORTS
+# ─────────────────────────────────────────────────────────────────────────────
+FORMATS = {  # key: (label, extension, mime, builder, cpu-heavy)
+    "txt":  ("📄 Text",     "txt",  "text/plain",      export_txt,  False),
+    "md":   ("📝 Markdown", "md",   "text/markdown",   export_md,   False),
+    "pdf":  ("📕 PDF",      "pdf",  "application/pdf", export_pdf,  True),
+    "docx": ("📘 Word",     "docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+             export_docx, True),
+}
+
+def available_formats() -> list:
+    return [f for f in FORMATS if (f != "pdf" or HAS_PDF) and (f != "docx" or HAS_DOCX)]
+
+class Exporter:
+    # Shared by all sessions. Results are memoized by (format, conversation digest,
+    # model); PDF/DOCX are built on a worker pool so the script thread never waits.
+    def __init__(self, workers: int = 2, max_items: int = 64):
+        self.max_items = max_items
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nc-export")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, fmt: str, digest: str, model: str) -> Future | None:
+        with self._lock:
+            return self._jobs.get((fmt, digest, model))
+
+    def request(self, fmt: str, messages: list, digest: str, model: str) -> Future:
+        key = (fmt, digest, model)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done() and job.exception()):
+                self._jobs.move_to_end(key)
+                return job
+            build    = FORMATS[fmt][3]
+            snapshot = [{"role": m["role"], "content": m["content"]} for m in messages]
+            if FORMATS[fmt][4]:
+                job = self._pool.submit(build, snapshot, model)
+            else:
+                job = Future()
+                try:
+                    job.set_result(build(snapshot, model))
+                except Exception as e:
+                    job.set_exception(e)
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_items:
+                self._jobs.popitem(last=False)
+            return job
@@ -0,0 +1,76 @@
+"""Single-flight — identical in-flight requests share one upstream stream.
+
+The first caller for a key starts a producer thread that pumps the reply into
+a `Flight`; every caller, including the first, reads it through `follow()`,
+which replays the already-received prefix before waiting for new chunks. The
+producer runs to completion even if its first reader goes away, so late
+joiners always get the whole reply.
+"""
+from __future__ import annotations
+import threading
+
+class Flight:
+    # Append-only fan-out buffer with one writer and any number of readers.
+    def __init__(self):
+        self.parts   = []
+        self.info    = {}
+        self.done    = False
+        self.readers = 0
+        self._cond   = threading.Condition()
+
+    def push(self, text: str):
+        with self._cond:
+            self.parts.append(text)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    def follow(self):
+        with self._cond:
+            self.readers += 1
+        i = 0
+        while True:
+            with self._cond:
+                while i == len(self.parts) and not self.done:
+                    self._cond.wait()
+                batch, i = self.parts[i:], len(self.parts)
+                done = self.done
+            if batch:
+                yield "".join(batch)
+            if done and not batch:
+                return
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock    = threading.Lock()
+        self.joined   = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def join(self, key: str, produce) -> tuple:
+        """Return (flight, leader). The leader's `produce(flight.info)` generator is
+        pumped into the flight from a daemon thread; followers just read it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.joined += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+        threading.Thread(target=self._pump, args=(key, flight, produce), daemon=True,
+                         name="nc-flight").start()
+        return flight, True
+
+    def _pump(self, key: str, flight: Flight, produce):
+        try:
+            for text in produce(flight.info):
+                flight.push(text)
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish()
@@ -0,0 +1,136 @@
+"""Process-wide model health scoreboard with a per-model circuit breaker."""
+from __future__ import annotations
+import threading, time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+class CircuitOpen(Exception):
+    """Raised at launch when a half-open model's single probe slot is already taken."""
+    def __init__(self, model: str):
+        super().__init__(f"{model} circuit open, probe already in flight")
+        self.model = model
+
+class _Stats:
+    __slots__ = ("ttft", "tps", "fail", "streak", "state", "opened", "cooldown", "probe", "n")
+
+    def __init__(self):
+        self.ttft     = None   # EWMA seconds to first token
+        self.tps      = None   # EWMA chunks per second after the first token
+        self.fail     = 0.0    # EWMA failure rate, 0..1
+        self.streak   = 0      # consecutive failures
+        self.state    = CLOSED
+        self.opened   = 0.0
+        self.cooldown = 0.0
+        self.probe    = 0.0    # start time of the in-flight half-open probe
+        self.n        = 0
+
+class ModelHealth:
+    def __init__(self, alpha: float = 0.3, trip_after: int = 3, trip_rate: float = 0.6,
+                 cooldown: float = 60.0, max_cooldown: float = 600.0,
+                 probe_timeout: float = 60.0, prior_ttft: float = 4.0, fail_penalty: float = 20.0):
+        self.alpha         = alpha
+        self.trip_after    = trip_after
+        self.trip_rate     = trip_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown  = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.prior_ttft    = prior_ttft
+        self.fail_penalty  = fail_penalty
+        self._m    = {}
+        self._lock = threading.Lock()
+
+    def _get(self, model: str) -> _Stats:
+        s = self._m.get(model)
+        if s is None:
+            s = self._m[model] = _Stats()
+        return s
+
+    def _ewma(self, old, new: float) -> float:
+        return new if old is None else old + self.alpha * (new - old)
+
+    # ── Breaker ──────────────────────────────────────────────────────────────
+    def state(self, model: str, now: float | None = None) -> str:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            s = self._get(model)
+            if s.state == OPEN and now - s.opened >= s.cooldown:
+                s.state = HALF_OPEN
+            return s.state
+
+    def ready(self, model: str) -> bool:
+        # Would allow() pass right now? Checks without claiming the probe slot.
+        now = time.monotonic()
+        if self.state(model, now) == CLOSED:
+            return True
+        with self._lock:
+            s = self._get(model)
+            return s.state == HALF_OPEN and (not s.probe or now - s.probe > self.probe_timeout)
+
+    def allow(self, model: str) -> bool:
+        # Closed models always pass; a half-open model lets exactly one probe through.
+        # Call it when the request is actually sent: a pass claims the probe slot.
+        now = time.monotonic()
+        if self.state(model, now) == CLOSED:
+            return True
+        with self._lock:
+            s = self._get(model)
+            if s.state == HALF_OPEN and (not s.probe or now - s.probe > self.probe_timeout):
+                s.probe = now
+                return True
+            return False
+
+    def record_success(self, model: str, ttft: float, chunks: int, duration: float):
+        with self._lock:
+            s = self._get(model)
+            s.n     += 1
+            s.ttft   = self._ewma(s.ttft, ttft)
+            if duration > ttft and chunks > 1:
+                s.tps = self._ewma(s.tps, (chunks - 1) / (duration - ttft))
+            s.fail   = self._ewma(s.fail, 0.0)
+            s.streak = 0
+            s.state, s.probe, s.cooldown = CLOSED, 0.0, 0.0
+
+    def record_failure(self, model: str, duration: float = 0.0):
+        now = time.monotonic()
+        with self._lock:
+            s = self._get(model)
+            s.n     += 1
+            s.fail   = self._ewma(s.fail, 1.0)
+            s.streak += 1
+            if duration:
+                s.ttft = self._ewma(s.ttft, duration)
+            if s.state == HALF_OPEN or s.streak >= self.trip_after or \
+               (s.n >= self.trip_after and s.fail >= self.trip_rate):
+                s.cooldown = min(self.max_cooldown, s.cooldown * 2 if s.cooldown else self.base_cooldown)
+                s.state, s.opened, s.probe = OPEN, now, 0.0
+
+    # ── Ranking ──────────────────────────────────────────────────────────────
+    def score(self, model: str) -> float:
+        # Expected seconds until useful output: a failure costs `fail_penalty` seconds.
+        with self._lock:
+            s = self._get(model)
+            ttft = self.prior_ttft if s.ttft is None else s.ttft
+            bonus = min(s.tps or 0.0, 100.0) / 100.0
+            return ttft + s.fail * self.fail_penalty - bonus
+
+    def order(self, cands: list, pinned: list = ()) -> list:
+        # Pinned models (sticky, then the user's pick) lead; the rest by score.
+        # Open circuits are skipped unless every candidate is open.
+        pinned = [m for m in dict.fromkeys(pinned) if m in cands]
+        rest   = sorted((m for m in cands if m not in pinned), key=self.score)
+        ranked = [m for m in pinned + rest if self.state(m) != OPEN]
+        return ranked or pinned + rest
+
+    def plan(self, cands: list, pinned: list = ()) -> list:
+        # Drops models that would not be allowed now, without claiming probe
+        # slots: allow() does that when an attempt launches. Falls back to the
+        # full ranking when nothing is ready so a request is never refused outright.
+        ranked = self.order(cands, pinned)
+        return [m for m in ranked if self.ready(m)] or ranked
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            models = list(self._m)
+        return {m: {"state": self.state(m), "score": round(self.score(m), 2),
+                    "ttft": self._m[m].ttft, "tps": self._m[m].tps, "fail": self._m[m].fail}
+                for m in models}
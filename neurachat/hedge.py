@@ -0,0 +1,122 @@
+"""Hedged streaming — race fallback candidates on a time-to-first-token deadline."""
+from __future__ import annotations
+import queue, threading, time
+
+class Attempt(threading.Thread):
+    # One upstream stream, pumped into the shared event queue from a worker thread.
+    def __init__(self, model: str, open_stream, q: queue.Queue):
+        super().__init__(daemon=True, name=f"nc-attempt-{model}")
+        self.model       = model
+        self.open_stream = open_stream
+        self.q           = q
+        self.parts       = []
+        self.t0          = time.monotonic()
+        self.ttft        = 0.0
+        self.usage       = None
+        self.cancelled   = False
+        self._stream     = None
+
+    @property
+    def chunks(self) -> int:
+        return len(self.parts)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.t0
+
+    def run(self):
+        try:
+            self._stream = self.open_stream(self.model)
+            if self.cancelled:
+                return
+            for chunk in self._stream:
+                if self.cancelled:
+                    return
+                if getattr(chunk, "usage", None):
+                    self.usage = chunk.usage
+                d = chunk.choices[0].delta if chunk.choices else None
+                if d and d.content:
+                    if not self.parts:
+                        self.ttft = self.elapsed
+                    self.parts.append(d.content)
+                    self.q.put(("chunk", self, d.content))
+            self.q.put(("done", self, None))
+        except Exception as e:
+            if not self.cancelled:
+                self.q.put(("error", self, e))
+        finally:
+            if self.cancelled:
+                self._close()
+
+    def cancel(self):
+        # Closing the HTTP response also unblocks a read in progress on the worker.
+        self.cancelled = True
+        self._close()
+
+    def _close(self):
+        s = self._stream
+        if s is not None:
+            try:
+                s.close()
+            except Exception:
+                pass
+
+def race(cands: list, open_stream, deadline: float | None = None, parallel: int = 1):
+    """Yield ("chunk", attempt, text), ("done", attempt, None) and ("fail", attempt, exc).
+
+    Candidates start one at a time. While no stream has produced content, the next
+    candidate is launched each time `deadline` seconds pass without a first token
+    (up to `parallel` concurrent streams) or as soon as a live attempt fails.
+    The first attempt to produce content wins and every other stream is closed.
+    A "fail" with exc=None means the model returned an empty response.
+    """
+    q       = queue.Queue()
+    pending = list(cands)
+    live    = {}
+    winner  = None
+    started = 0.0
+
+    def launch():
+        nonlocal started
+        a = Attempt(pending.pop(0), open_stream, q)
+        live[a] = True
+        started = time.monotonic()
+        a.start()
+
+    try:
+        if pending:
+            launch()
+        while live:
+            hedging = winner is None and pending and deadline and len(live) < parallel
+            wait    = max(0.0, deadline - (time.monotonic() - started)) if hedging else None
+            try:
+                kind, a, payload = q.get(timeout=wait)
+            except queue.Empty:
+                launch()
+                continue
+            if a not in live:
+                continue  # late event from a cancelled loser
+            if kind == "chunk":
+                if winner is None:
+                    winner = a
+                    for other in [o for o in live if o is not a]:
+                        del live[other]
+                        other.cancel()
+                yield "chunk", a, payload
+                continue
+            del live[a]
+            if kind == "done" and a is winner:
+                yield "done", a, None
+                return
+            if a is winner:
+                winner = None
+            yield "fail", a, payload
+            if pending and winner is None and len(live) < parallel:
+                launch()
+    finally:
+        for a in live:
+            a.cancel()
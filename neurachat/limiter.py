@@ -0,0 +1,201 @@
+"""Adaptive rate limiting — token buckets per model and per API key, shared process-wide.
+
+Every session routes through one limiter, so a traffic spike is spread across
+the fallback chain before requests go out instead of each session discovering
+the same 429 in lock-step. Buckets back off multiplicatively on 429s (honouring
+Retry-After and X-RateLimit-* headers) and recover additively on success.
+"""
+from __future__ import annotations
+import email.utils, hashlib, threading, time
+
+class Throttled(Exception):
+    """Raised instead of sending when a model's bucket would make the caller wait too long."""
+    def __init__(self, model: str, wait: float):
+        super().__init__(f"{model} rate limited locally for {wait:.1f}s")
+        self.model = model
+        self.wait  = wait
+
+def key_id(api_key: str) -> str:
+    # Buckets are labelled by a digest, never the key itself.
+    return hashlib.blake2b((api_key or "").encode(), digest_size=6).hexdigest()
+
+def _header(headers, name: str) -> str | None:
+    if headers is None:
+        return None
+    try:
+        return headers.get(name)
+    except AttributeError:
+        return None
+
+def retry_after(headers, now: float | None = None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)."""
+    v = _header(headers, "retry-after")
+    if not v:
+        return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(v).timestamp() - (now or time.time()))
+    except (TypeError, ValueError):
+        return None
+
+def rate_headers(headers, now: float | None = None) -> tuple:
+    """(remaining, seconds until reset) from X-RateLimit-* headers; either may be None.
+
+    OpenRouter sends the reset as epoch milliseconds; epoch seconds and plain
+    deltas are accepted too.
+    """
+    remaining = reset = None
+    try:
+        if (v := _header(headers, "x-ratelimit-remaining")) is not None:
+            remaining = int(float(v))
+        if (v := _header(headers, "x-ratelimit-reset")) is not None:
+            r   = float(v)
+            now = now or time.time()
+            reset = max(0.0, r / 1000 - now if r > 1e12 else r - now if r > 1e9 else r)
+    except ValueError:
+        pass
+    return remaining, reset
+
+class TokenBucket:
+    # rate <= 0 means unlimited until a 429 or header teaches it otherwise.
+    def __init__(self, rate: float, burst: float, min_rate: float = 0.01):
+        self.max_rate = rate
+        self.rate     = rate
+        self.min_rate = min_rate
+        self.burst    = max(1.0, burst)
+        self.tokens   = self.burst
+        self.until    = 0.0          # hard block until this monotonic time
+        self._t       = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def wait(self, now: float) -> float:
+        self._refill(now)
+        w = max(0.0, self.until - now)
+        if self.rate > 0 and self.tokens < 1:
+            w = max(w, (1 - self.tokens) / self.rate)
+        return w
+
+    def take(self, now: float):
+        self._refill(now)
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def throttle(self, now: float, block: float | None):
+        # Multiplicative decrease, once per block: 429s for requests that were
+        # already in flight when the first one landed only extend the block.
+        # An unlimited bucket starts from one request per `block` seconds (or
+        # per 10 s) once it meets its first 429.
+        if now >= self.until:
+            self.rate = max(self.min_rate, self.rate / 2 if self.rate > 0 else 1.0 / max(block or 10.0, 1.0))
+        if block is None:
+            block = 1.0 / self.rate if self.rate > 0 else 10.0
+        self.tokens = min(self.tokens, 0.0)
+        self.until  = max(self.until, now + block)
+
+    def relax(self, now: float):
+        # Additive increase back towards the configured rate; a learned limit on
+        # an unlimited bucket doubles away until it is dropped again. Nothing
+        # recovers while a block is still in force.
+        if now < self.until:
+            return
+        if self.max_rate > 0 and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+        elif self.max_rate <= 0 < self.rate:
+            self.rate = 0.0 if self.rate >= 8 else self.rate * 2
+
+    def sync(self, now: float, remaining: int | None, reset: float | None):
+        if remaining is None:
+            return
+        if remaining <= 0 and reset:
+            self.until = max(self.until, now + reset)
+        self.tokens = min(self.tokens, float(remaining))
+
+class RateLimiter:
+    def __init__(self, model_rate: float = 20 / 60, model_burst: float = 4, key_rate: float = 0.0,
+                 key_burst: float = 10, max_wait: float = 2.0):
+        self.model_rate  = model_rate
+        self.model_burst = model_burst
+        self.key_rate    = key_rate
+        self.key_burst   = key_burst
+        self.max_wait    = max_wait
+        self.throttled   = 0
+        self._buckets    = {}   # (key id, model or None) -> TokenBucket
+        self._lock       = threading.Lock()
+
+    def _bucket(self, key: str, model: str | None) -> TokenBucket:
+        b = self._buckets.get((key, model))
+        if b is None:
+            b = self._buckets[(key, model)] = TokenBucket(self.model_rate, self.model_burst) if model \
+                else TokenBucket(self.key_rate, self.key_burst)
+        return b
+
+    def wait(self, model: str, key: str = "") -> float:
+        now = time.monotonic()
+        with self._lock:
+            return max(self._bucket(key, model).wait(now), self._bucket(key, None).wait(now))
+
+    def spread(self, cands: list, key: str = "") -> list:
+        """Candidates that can send now keep their order; the rest follow, soonest first."""
+        waits = {m: self.wait(m, key) for m in cands}
+        return sorted(cands, key=lambda m: (waits[m] > 0, waits[m]))
+
+    def acquire(self, model: str, key: str = "", max_wait: float | None = None):
+        """Take a token for `model`, sleeping up to `max_wait`; raise Throttled beyond that."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                mb, kb = self._bucket(key, model), self._bucket(key, None)
+                w = max(mb.wait(now), kb.wait(now))
+                if w <= 0:
+                    mb.take(now)
+                    kb.take(now)
+                    return
+            if now + w > deadline:
+                self.throttled += 1
+                raise Throttled(model, w)
+            time.sleep(w)
+
+    def observe(self, model: str, key: str = "", headers=None):
+        """A request succeeded: recover the rate and apply any X-RateLimit-* hints.
+
+        The headers describe the key's quota, so they sync the key bucket as
+        well as the model's.
+        """
+        remaining, reset = rate_headers(headers)
+        now = time.monotonic()
+        with self._lock:
+            for b in (self._bucket(key, model), self._bucket(key, None)):
+                b.relax(now)
+                b.sync(now, remaining, reset)
+
+    def limited(self, model: str, key: str = "", headers=None):
+        """A request got a 429: back off, honouring Retry-After / X-RateLimit-Reset.
+
+        Only the model's bucket learns a lower rate, so the chain can fall
+        through to the next model. The key bucket is blocked as well only when
+        the headers say the key itself is spent (X-RateLimit-Remaining 0 with a
+        reset), which holds every model back until then.
+        """
+        remaining, reset = rate_headers(headers)
+        block    = retry_after(headers)
+        block    = block if block is not None else reset
+        now      = time.monotonic()
+        with self._lock:
+            self._bucket(key, model).throttle(now, block)
+            if remaining is not None and remaining <= 0 and reset:
+                self._bucket(key, None).sync(now, remaining, reset)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {f"{k}/{m or '*'}": {"rate": b.rate, "tokens": round(b.tokens, 2), "wait": round(b.wait(now), 2)}
+                    for (k, m), b in self._buckets.items()}
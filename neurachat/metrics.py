@@ -0,0 +1,210 @@
+"""Process-wide generation metrics in Prometheus text format.
+
+Exposed from a side HTTP listener (NEURACHAT_METRICS_PORT) and/or rewritten
+periodically to a file for node_exporter's textfile collector
+(NEURACHAT_METRICS_FILE). Stdlib only.
+"""
+from __future__ import annotations
+import bisect, os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_INF         = 'le="+Inf"'
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(v) -> str:
+    return str(v).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+def _num(x: float) -> str:
+    return repr(float(x)) if x != int(x) or abs(x) >= 1e15 else str(int(x))
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: tuple = ()):
+        self.name   = name
+        self.doc    = doc
+        self.labels = labels
+        self.values = {}
+        self._lock  = threading.Lock()
+
+    def inc(self, *labels, by: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + by
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for lv, v in sorted(self.values.items()):
+                out.append(f"{self.name}{_labels(self.labels, lv)} {_num(v)}")
+        return out
+
+class Gauge:
+    # Sampled when metrics are rendered rather than pushed.
+    def __init__(self, name: str, doc: str, read):
+        self.name = name
+        self.doc  = doc
+        self.read = read
+
+    def render(self) -> list:
+        try:
+            v = float(self.read())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge", f"{self.name} {_num(v)}"]
+
+class Histogram:
+    # Cumulative buckets are derived at render time; observe() bumps one slot.
+    def __init__(self, name: str, doc: str, buckets: tuple, labels: tuple = ()):
+        self.name    = name
+        self.doc     = doc
+        self.labels  = labels
+        self.buckets = tuple(sorted(buckets))
+        self.series  = {}   # label values -> [counts per bucket + overflow, sum]
+        self._lock   = threading.Lock()
+
+    def observe(self, x: float, *labels):
+        with self._lock:
+            s = self.series.get(labels)
+            if s is None:
+                s = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][bisect.bisect_left(self.buckets, x)] += 1
+            s[1] += x
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for lv, (counts, total) in sorted(self.series.items()):
+                seen = 0
+                for edge, c in zip(self.buckets, counts):
+                    seen += c
+                    le    = 'le="%s"' % _num(edge)
+                    out.append(f"{self.name}_bucket{_labels(self.labels, lv, le)} {seen}")
+                seen += counts[-1]
+                out.append(f"{self.name}_bucket{_labels(self.labels, lv, _INF)} {seen}")
+                out.append(f"{self.name}_sum{_labels(self.labels, lv)} {_num(total)}")
+                out.append(f"{self.name}_count{_labels(self.labels, lv)} {seen}")
+        return out
+
+_SECONDS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 120)
+
+class GenerationMetrics:
+    """Counters and histograms recorded once per `Router.stream()` call.
+
+    `outcome` is "ok", "cached", "coalesced" or "error"; `error` is a short class such as
+    "rate_limit", "timeout", "connection", "exhausted", "unexpected" or
+    "midstream" (a stream that broke off after output and was continued elsewhere).
+    """
+    def __init__(self):
+        self.requests  = Counter("neurachat_requests_total",
+                                 "Generations by answering model and outcome.", ("model", "outcome"))
+        self.fallbacks = Counter("neurachat_fallbacks_total",
+                                 "Candidates that failed before a model answered.", ("model",))
+        self.failures  = Counter("neurachat_attempt_failures_total",
+                                 "Failed upstream attempts by model and error class.", ("model", "error"))
+        self.errors    = Counter("neurachat_errors_total",
+                                 "Generations that ended in an error shown to the user.", ("error",))
+        self.ttft      = Histogram("neurachat_ttft_seconds",
+                                   "Time from request to first output chunk.", _SECONDS, ("model",))
+        self.duration  = Histogram("neurachat_duration_seconds",
+                                   "Total generation time (monotonic clock).", _SECONDS, ("model",))
+        self.chunks    = Histogram("neurachat_output_chunks",
+                                   "Upstream content chunks per reply.",
+                                   (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500), ("model",))
+        self.rate      = Histogram("neurachat_tokens_per_second",
+                                   "Output tokens per second after the first token.",
+                                   (1, 5, 10, 20, 40, 60, 80, 120, 160, 250, 400), ("model",))
+        self.fallback_depth = Histogram("neurachat_fallback_depth",
+                                        "Candidates that failed before each answer.", (0, 1, 2, 3, 4, 5))
+        self.prompt_tokens = Counter("neurachat_prompt_tokens_total",
+                                     "Prompt tokens billed upstream, from response usage.", ("model",))
+        self.prompt_cached = Counter("neurachat_prompt_cached_tokens_total",
+                                     "Prompt tokens served from the provider's prompt cache.", ("model",))
+        self.extra = []
+
+    def add(self, metric):
+        """Register another metric (e.g. a Gauge) to be rendered with these."""
+        self.extra.append(metric)
+
+    def all(self) -> list:
+        return [self.requests, self.fallbacks, self.failures, self.errors, self.ttft,
+                self.duration, self.chunks, self.rate, self.fallback_depth, self.prompt_tokens,
+                self.prompt_cached] + self.extra
+
+    def answered(self, model: str, ttft: float, duration: float, chunks: int, tokens: int,
+                 fallbacks: int):
+        self.requests.inc(model, "ok")
+        self.ttft.observe(ttft, model)
+        self.duration.observe(duration, model)
+        self.chunks.observe(chunks, model)
+        if duration > ttft and tokens:
+            self.rate.observe(tokens / (duration - ttft), model)
+        self.fallback_depth.observe(fallbacks)
+        if fallbacks:
+            self.fallbacks.inc(model, by=fallbacks)
+
+    def prompt_usage(self, model: str, prompt: int, cached: int):
+        # cached / prompt is the provider-side prefix cache hit rate.
+        self.prompt_tokens.inc(model, by=prompt)
+        self.prompt_cached.inc(model, by=cached)
+
+    def cached(self, model: str, duration: float):
+        self.requests.inc(model, "cached")
+        self.duration.observe(duration, model)
+
+    def coalesced(self, model: str, duration: float):
+        self.requests.inc(model, "coalesced")
+        self.duration.observe(duration, model)
+
+    def attempt_failed(self, model: str, error: str):
+        self.failures.inc(model, error)
+
+    def failed(self, error: str, duration: float, fallbacks: int):
+        self.requests.inc("", "error")
+        self.errors.inc(error)
+        self.duration.observe(duration, "")
+        self.fallback_depth.observe(fallbacks)
+
+    def render(self) -> str:
+        return "\n".join(line for m in self.all() for line in m.render()) + "\n"
+
+def serve(metrics: GenerationMetrics, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `GET /metrics` from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True, name="nc-metrics-http").start()
+    return srv
+
+def export_file(metrics: GenerationMetrics, path: str, interval: float = 15.0) -> threading.Thread:
+    """Rewrite `path` every `interval` seconds; the rename keeps readers from seeing partial files."""
+    def loop():
+        while True:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(metrics.render())
+                os.replace(tmp, path)
+            except OSError:
+                pass
+            time.sleep(interval)
+    t = threading.Thread(target=loop, daemon=True, name="nc-metrics-file")
+    t.start()
+    return t
@@ -0,0 +1,13 @@
+"""Models — the curated free models: labels, order and the offline fallback for the catalog."""
+
+FREE_MODELS = [  # (label, model id, context window in tokens)
+    ("🌟 Gemini 2.0 Flash",       "google/gemini-2.0-flash-exp:free",              1048576),
+    ("🧠 DeepSeek V3 0324",       "deepseek/deepseek-chat-v3-0324:free",           163840),
+    ("🦙 LLaMA 4 Maverick",       "meta-llama/llama-4-maverick:free",              128000),
+    ("🔮 Mistral Small 3.1",      "mistralai/mistral-small-3.1-24b-instruct:free", 96000),
+    ("🌙 Gemma 3 27B",            "google/gemma-3-27b-it:free",                    96000),
+    ("⚡ Qwen2.5 72B",            "qwen/qwen-2.5-72b-instruct:free",               32768),
+]
+FREE_MODEL_NAMES = [m[0] for m in FREE_MODELS]
+FREE_MODEL_IDS   = {m[0]: m[1] for m in FREE_MODELS}
+FREE_MODEL_CTX   = {m[1]: m[2] for m in FREE_MODELS}
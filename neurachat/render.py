@@ -0,0 +1,105 @@
+"""Streaming render helpers — flush pacing, delta coalescing, block freezing."""
+import re, time
+
+class FlushPolicy:
+    # Re-render when enough time has passed since the last flush. The interval
+    # grows with the size of the text being re-rendered, since each flush
+    # re-sends and re-parses all of it.
+    def __init__(self, base_ms: float = 50.0, max_ms: float = 400.0, chars_per_ms: float = 100.0,
+                 burst_chars: int = 2000):
+        self.base_ms      = base_ms
+        self.max_ms       = max_ms
+        self.chars_per_ms = chars_per_ms
+        self.burst_chars  = burst_chars
+        self._last        = time.monotonic()
+        self._sent        = 0
+
+    def interval_ms(self, render_chars: int) -> float:
+        return min(self.max_ms, self.base_ms + render_chars / self.chars_per_ms)
+
+    def due(self, total_chars: int, render_chars: int) -> bool:
+        pending = total_chars - self._sent
+        if pending <= 0:
+            return False
+        if pending >= self.burst_chars:
+            return True
+        return (time.monotonic() - self._last) * 1000 >= self.interval_ms(render_chars)
+
+    def flushed(self, total_chars: int):
+        self._last = time.monotonic()
+        self._sent = total_chars
+
+class Coalescer:
+    # Merges tiny upstream deltas into fewer, larger chunks. A held delta goes out
+    # once `min_chars` are pending or `max_wait` seconds have passed, checked
+    # whenever the next delta arrives; drain() releases the rest.
+    def __init__(self, min_chars: int = 16, max_wait: float = 0.05):
+        self.min_chars = min_chars
+        self.max_wait  = max_wait
+        self._buf      = []
+        self._n        = 0
+        self._t        = 0.0
+
+    def push(self, text: str) -> str:
+        if not self._buf:
+            self._t = time.monotonic()
+        self._buf.append(text)
+        self._n += len(text)
+        if self._n >= self.min_chars or time.monotonic() - self._t >= self.max_wait:
+            return self.drain()
+        return ""
+
+    def drain(self) -> str:
+        out = "".join(self._buf)
+        self._buf.clear()
+        self._n = 0
+        return out
+
+_BLOCK_EDGE = re.compile(r"^[ \t]*(```|~~~)|(\$\$)|\n\n", re.M)
+_NEXT_LINE  = re.compile(r"\n*([^\n])")
+
+def safe_cut(text: str, start: int = 0) -> int:
+    """Return the end of the last complete markdown block in text[start:].
+
+    A block is complete once a blank line follows it outside a fenced code
+    block or a $$ math block, and the next line has started unindented: an
+    indented line may still continue it (a list item's body, an indented
+    fence). `start` must itself be a block boundary (as returned earlier).
+    """
+    cut, fenced, math = start, False, False
+    for m in _BLOCK_EDGE.finditer(text, start):
+        if m.group(1):
+            fenced = not fenced
+        elif m.group(2):
+            if not fenced:
+                math = not math
+        elif not (fenced or math):
+            nxt = _NEXT_LINE.match(text, m.end())
+            if nxt and nxt.group(1) not in " \t":
+                cut = m.end()
+    return cut
+
+def render_stream(chunks, slot, new_slot, policy: FlushPolicy, freeze: bool = True,
+                  on_first=None, cursor: str = "▌") -> str:
+    """Drive `slot.markdown()` from a chunk stream and return the full reply.
+
+    Flushes are paced by `policy`. With `freeze`, each completed markdown block
+    is written once into the current slot and streaming moves on to a fresh
+    one from `new_slot()`, so only the still-growing tail is re-rendered.
+    """
+    reply, done, first = "", 0, True
+    for chunk in chunks:
+        if first and on_first:
+            on_first()
+        first  = False
+        reply += chunk
+        if policy.due(len(reply), len(reply) - done):
+            cut = safe_cut(reply, done) if freeze else done
+            if cut > done:
+                slot.markdown(reply[done:cut])
+                slot = new_slot()
+                done = cut
+            slot.markdown(reply[done:] + cursor)
+            policy.flushed(len(reply))
+    slot.markdown(reply[done:])
+    return reply
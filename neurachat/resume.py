@@ -0,0 +1,63 @@
+"""Mid-stream failover — let the next model continue a reply that broke off.
+
+The text already shown stays; the next candidate gets the conversation plus the
+partial reply and is asked to carry on from the exact cut. Models don't always
+comply to the character, so the start of the continuation goes through a
+`Splicer`, which drops a repeated tail or a restart of the partial reply.
+"""
+from __future__ import annotations
+
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off mid-stream. Continue it from exactly where it stopped: "
+    "do not repeat anything already written, add no preamble, and keep the same formatting "
+    "(stay inside an open code block, list or table)."
+)
+MIN_OVERLAP = 8      # shorter repeats are as likely to be coincidence as echo
+
+def continuation(api_msgs: list, partial: str) -> list:
+    """`api_msgs` extended so the next model picks up after `partial`."""
+    return api_msgs + [{"role": "assistant", "content": partial},
+                       {"role": "user", "content": CONTINUE_PROMPT}]
+
+def overlap(partial: str, text: str) -> int:
+    """Leading characters of `text` that repeat the end of `partial`."""
+    for k in range(min(len(partial), len(text)), MIN_OVERLAP - 1, -1):
+        if partial.endswith(text[:k]):
+            return k
+    return 0
+
+class Splicer:
+    # Holds back the first `window` characters of a continuation until it can
+    # tell how much of it repeats the partial reply, then passes text through.
+    def __init__(self, partial: str, window: int = 160):
+        self.partial = partial
+        self.window  = window
+        self.buf     = ""
+        self.done    = False
+        self.dropped = 0
+
+    def push(self, text: str) -> str:
+        if self.done:
+            return text
+        self.buf += text
+        # A restart repeats the partial from its first character; wait it out.
+        if self.partial.startswith(self.buf.lstrip()):
+            return ""
+        if len(self.buf) < min(self.window, len(self.partial)):
+            return ""
+        return self.drain()
+
+    def drain(self) -> str:
+        if self.done:
+            return ""
+        self.done = True
+        buf, stripped = self.buf, self.buf.lstrip()
+        lead = len(buf) - len(stripped)
+        if stripped.startswith(self.partial):
+            self.dropped = lead + len(self.partial)
+        elif k := overlap(self.partial, buf):
+            self.dropped = k
+        elif k := overlap(self.partial, stripped):
+            self.dropped = lead + k
+        self.buf = ""
+        return buf[self.dropped:]
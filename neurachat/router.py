@@ -0,0 +1,310 @@
+"""Fallback router — cache, context trimming, health-ranked fallback, hedging.
+
+Streamlit-free so the same routing can run in benchmarks and headless tools.
+"""
+from __future__ import annotations
+import os, time
+
+from .cache import ResponseCache, history_hash, make_key, replay
+from .context import context_budget, fit
+from .health import CircuitOpen, ModelHealth
+from .flight import SingleFlight
+from .hedge import race
+from .limiter import RateLimiter, Throttled, key_id
+from .metrics import GenerationMetrics, export_file, serve
+from .render import Coalescer
+from .resume import Splicer, continuation
+from .tokens import count_tokens
+
+# Hedged mode: seconds without a first token before the next model is raced.
+HEDGE_TTFT     = float(os.getenv("NEURACHAT_HEDGE_TTFT", "6"))
+# Identical requests are answered from cache. Only near-deterministic sampling is
+# cached by default — raise NEURACHAT_CACHE_MAX_TEMP to cache creative replies too.
+CACHE_MAX_TEMP = float(os.getenv("NEURACHAT_CACHE_MAX_TEMP", "0"))
+COALESCE_CHARS = int(os.getenv("NEURACHAT_COALESCE_CHARS", "16"))
+# Long chats are trimmed this many messages at a time so the prompt prefix stays
+# identical across turns and provider-side prompt caching keeps hitting.
+TRIM_STEP      = int(os.getenv("NEURACHAT_TRIM_STEP", "8"))
+# Providers that only cache prompts at explicit `cache_control` breakpoints;
+# the others (OpenAI, DeepSeek, ...) cache identical prefixes automatically.
+PROMPT_CACHE   = os.getenv("NEURACHAT_PROMPT_CACHE", "1") != "0"
+_CACHE_HINTED  = ("anthropic/", "google/gemini")
+
+EXTRA_HEADERS = {
+    "HTTP-Referer": "https://neurachat.app",
+    "X-Title": "NeuraChat AI",
+}
+_RETRYABLE = ["429", "404", "quota", "not found", "temporarily", "overloaded", "unavailable",
+              "no endpoints", "moderation", "context length"]
+
+def cache_hints(api_msgs: list) -> list:
+    """Mark the system prompt and the end of the prior history as cache breakpoints."""
+    marks = {0, len(api_msgs) - 2} if len(api_msgs) > 2 else {0}
+    return [{"role": m["role"], "content": [{"type": "text", "text": m["content"],
+                                             "cache_control": {"type": "ephemeral"}}]}
+            if i in marks else m for i, m in enumerate(api_msgs)]
+
+def prompt_usage(usage) -> tuple:
+    """(prompt tokens, of which served from the provider's prompt cache) from a usage block."""
+    if usage is None:
+        return 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(details, "cached_tokens", 0) or 0
+
+def make_health() -> ModelHealth:
+    return ModelHealth(
+        cooldown=float(os.getenv("NEURACHAT_BREAKER_COOLDOWN", "60")),
+        trip_after=int(os.getenv("NEURACHAT_BREAKER_TRIP", "3")),
+    )
+
+def make_cache() -> ResponseCache:
+    return ResponseCache(
+        max_entries=int(os.getenv("NEURACHAT_CACHE_ENTRIES", "256")),
+        ttl=float(os.getenv("NEURACHAT_CACHE_TTL", "3600")),
+        path=os.getenv("NEURACHAT_CACHE_DB") or None,
+    )
+
+def make_limiter() -> RateLimiter:
+    return RateLimiter(
+        model_rate=float(os.getenv("NEURACHAT_RATE_MODEL_RPM", "20")) / 60,
+        model_burst=float(os.getenv("NEURACHAT_RATE_MODEL_BURST", "4")),
+        key_rate=float(os.getenv("NEURACHAT_RATE_KEY_RPM", "0")) / 60,
+        key_burst=float(os.getenv("NEURACHAT_RATE_KEY_BURST", "10")),
+        max_wait=float(os.getenv("NEURACHAT_RATE_MAX_WAIT", "2")),
+    )
+
+def make_metrics() -> GenerationMetrics:
+    m = GenerationMetrics()
+    if port := int(os.getenv("NEURACHAT_METRICS_PORT", "0")):
+        try:
+            serve(m, port, os.getenv("NEURACHAT_METRICS_HOST", "0.0.0.0"))
+        except OSError:
+            pass  # port already taken, e.g. by another replica on this host
+    if path := os.getenv("NEURACHAT_METRICS_FILE"):
+        export_file(m, path, float(os.getenv("NEURACHAT_METRICS_INTERVAL", "15")))
+    return m
+
+class Router:
+    def __init__(self, client, windows: dict, health: ModelHealth | None = None,
+                 cache: ResponseCache | None = None, metrics: GenerationMetrics | None = None,
+                 limiter: RateLimiter | None = None):
+        self.client  = client
+        self.windows = windows          # model id -> context window, in fallback order (or a ModelCatalog)
+        self.health  = health or make_health()
+        self.cache   = cache or make_cache()
+        self.metrics = metrics or GenerationMetrics()
+        self.limiter = limiter or make_limiter()
+        self.key     = key_id(getattr(client, "api_key", "") or "")
+        self.flights = SingleFlight()
+
+    def stream(self, messages: list, primary: str, system: str, temperature: float, max_tokens: int,
+               ctx_budget: int = 8192, hedge: bool = False, sticky: str | None = None,
+               info: dict | None = None, fallback: bool = True):
+        """Yield reply text for `messages`; errors are yielded as friendly markdown.
+
+        With `fallback=False` only `primary` is tried (compare mode), whatever
+        its health, and the history only has to fit its own context window.
+
+        `info` (if given) is filled with "trimmed" (history messages dropped to fit
+        the budget), "model" (the model that answered), "usage" (prompt and cached
+        prompt tokens reported upstream), "resumed" (one {"model", "at"} per stream
+        that broke off and was continued by the next model), "cached", "coalesced" and,
+        when the yielded text is an error message, "error" ("connection",
+        "unexpected" or "exhausted").
+        """
+        info    = {} if info is None else info
+        metrics = self.metrics
+        t0      = time.monotonic()
+
+        # Keep the system prompt plus the newest turns that fit the token budget.
+        windows  = list(self.windows.values()) + [self.windows.get(primary)] if fallback \
+                   else [self.windows.get(primary)]
+        budget   = context_budget(windows, max_tokens, ctx_budget)
+        start    = fit(messages, budget - count_tokens(system), step=TRIM_STEP)
+        info["trimmed"] = start
+        api_msgs = [{"role": "system", "content": system}] + \
+                   [{"role": m["role"], "content": m["content"]} for m in messages[start:]]
+
+        ckey = make_key(primary if fallback else f"only:{primary}", system, f"{start}:{history_hash(messages)}", temperature, max_tokens) \
+               if temperature <= CACHE_MAX_TEMP else None
+        if ckey and (hit := self.cache.get(ckey)) is not None:
+            info["cached"] = True
+            yield from replay(hit)
+            metrics.cached(primary, time.monotonic() - t0)
+            return
+
+        def produce(out: dict):
+            return self._generate(api_msgs, primary, sticky, temperature, max_tokens, hedge, ckey, t0, out,
+                                  fallback)
+
+        if not ckey:
+            yield from produce(info)
+            return
+
+        # Cacheable means deterministic, so an identical request already in
+        # flight (another session, same prompt) is shared instead of repeated.
+        flight, leader = self.flights.join(ckey, produce)
+        if not leader:
+            info["coalesced"] = True
+        yield from flight.follow()
+        info.update(flight.info)
+        if not leader:
+            metrics.coalesced(info.get("model", primary), time.monotonic() - t0)
+
+    def _generate(self, api_msgs: list, primary: str, sticky: str | None, temperature: float,
+                  max_tokens: int, hedge: bool, ckey: str | None, t0: float, info: dict,
+                  fallback: bool = True):
+        from openai import APITimeoutError, APIConnectionError, RateLimitError
+        health, metrics = self.health, self.metrics
+
+        # Sticky model (last success for this pick) first, then the pick itself,
+        # then the healthiest of the rest. Models with an open circuit are skipped.
+        # Models whose rate-limit bucket is empty move behind those that can send
+        # now, so load spreads over the chain before anything fails upstream.
+        limiter, key = self.limiter, self.key
+        chain = list(self.windows)
+        if primary not in chain:
+            chain.insert(0, primary)    # picked from the catalog but outside the fallback chain
+        cands = limiter.spread(health.plan(chain, [sticky, primary]), key) if fallback else [primary]
+        # A half-open model's probe slot is claimed when its attempt launches, so
+        # candidates the race never reaches leave it free. Not enforced when plan()
+        # had to fall back to open circuits, or for a single-model request.
+        gated = fallback and any(health.ready(m) for m in cands)
+        # What the next attempt sends; switched to a continuation request when a
+        # stream breaks after it has already shown text.
+        req = {"msgs": api_msgs, "hinted": cache_hints(api_msgs) if PROMPT_CACHE else api_msgs,
+               "max_tokens": max_tokens}
+
+        def open_stream(model: str):
+            if gated and not health.allow(model):
+                raise CircuitOpen(model)
+            limiter.acquire(model, key)
+            r   = req
+            raw = self.client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=r["hinted"] if model.startswith(_CACHE_HINTED) else r["msgs"],
+                max_tokens=r["max_tokens"],
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+                extra_headers=EXTRA_HEADERS,
+            )
+            limiter.observe(model, key, raw.headers)
+            return raw.parse()
+
+        # Hedged mode races the next candidate when the current one misses the TTFT
+        # deadline; otherwise candidates are tried strictly one after another.
+        co = Coalescer(COALESCE_CHARS)
+        last_error = "Unknown error"
+        ttft, fails = 0.0, 0
+        shown, splice = [], None     # text passed on so far; de-dup for a continuation
+        for kind, att, payload in race(cands, open_stream,
+                                       deadline=HEDGE_TTFT if hedge else None,
+                                       parallel=2 if hedge else 1):
+            if kind == "chunk":
+                if not ttft:
+                    ttft = time.monotonic() - t0
+                if splice is not None:
+                    payload = splice.push(payload)
+                shown.append(payload)
+                if out := co.push(payload):
+                    yield out
+                continue
+            if kind == "done" and splice is not None and (tail := splice.drain()):
+                shown.append(tail)
+                if out := co.push(tail):
+                    yield out
+            if out := co.drain():
+                yield out
+            if kind == "done":
+                health.record_success(att.model, att.ttft, att.chunks, att.elapsed)
+                info["model"] = att.model
+                prompt, cached = prompt_usage(att.usage)
+                if prompt:
+                    info["usage"] = {"prompt_tokens": prompt, "cached_tokens": cached}
+                    metrics.prompt_usage(att.model, prompt, cached)
+                text = "".join(shown)
+                if ckey:
+                    self.cache.put(ckey, text)
+                metrics.answered(att.model, ttft, time.monotonic() - t0, att.chunks,
+                                 count_tokens(text), fails)
+                return
+
+            fails += 1
+            e = payload
+            if att.chunks and (partial := "".join(shown)).strip():
+                # Broke off after text was shown (any error, including a dropped
+                # connection): keep it and have the next model continue from the
+                # cut instead of starting the answer over.
+                health.record_failure(att.model, att.elapsed)
+                metrics.attempt_failed(att.model, "midstream")
+                left = max_tokens - count_tokens(partial)
+                if left <= 0:
+                    # The caller's max_tokens is already spent: a reply that hadn't
+                    # broken off would have stopped here too.
+                    info["model"] = att.model
+                    metrics.answered(att.model, ttft, time.monotonic() - t0, att.chunks,
+                                     count_tokens(partial), fails)
+                    return
+                info.setdefault("resumed", []).append({"model": att.model, "at": len(partial)})
+                msgs   = continuation(api_msgs, partial)
+                req    = {"msgs": msgs, "hinted": cache_hints(msgs) if PROMPT_CACHE else msgs,
+                          "max_tokens": left}
+                splice = Splicer(partial)
+                last_error = f"stream from {att.model} broke off: {e}"
+            elif e is None:
+                # Empty response — try next
+                health.record_failure(att.model, att.elapsed)
+                metrics.attempt_failed(att.model, "empty")
+            elif isinstance(e, APITimeoutError):
+                last_error = "timeout"
+                health.record_failure(att.model, att.elapsed)
+                metrics.attempt_failed(att.model, "timeout")
+            elif isinstance(e, CircuitOpen):
+                # Another request is already probing this model; leave it to that.
+                last_error = str(e)
+                metrics.attempt_failed(att.model, "circuit_open")
+            elif isinstance(e, Throttled):
+                # Never sent: our own bucket said no. Not the model's fault.
+                last_error = "429 " + str(e)
+                metrics.attempt_failed(att.model, "throttled")
+            elif isinstance(e, RateLimitError):
+                last_error = str(e)
+                limiter.limited(att.model, key, getattr(e.response, "headers", None))
+                health.record_failure(att.model)
+                metrics.attempt_failed(att.model, "rate_limit")
+            elif isinstance(e, APIConnectionError):
+                metrics.attempt_failed(att.model, "connection")
+                metrics.failed("connection", time.monotonic() - t0, fails)
+                info["error"] = "connection"
+                yield (
+                    "\n\n**⚠️ Network Error**\n\n"
+                    "Internet connection issue. Please check your connection and try again."
+                )
+                return
+            else:
+                last_error = str(e)
+                err = last_error.lower()
+                if any(k in err for k in _RETRYABLE):
+                    health.record_failure(att.model)
+                    metrics.attempt_failed(att.model, "retryable")
+                else:
+                    metrics.attempt_failed(att.model, "unexpected")
+                    metrics.failed("unexpected", time.monotonic() - t0, fails)
+                    info["error"] = "unexpected"
+                    yield (
+                        f"\n\n**⚠️ Unexpected Error**\n\n"
+                        f"`{last_error[:200]}`\n\nPlease try again in a moment."
+                    )
+                    return
+
+        # All models failed
+        metrics.failed("exhausted", time.monotonic() - t0, fails)
+        info["error"] = "exhausted"
+        yield (
+            "\n\n**🕐 Servers are busy right now**\n\n"
+            "All AI models are currently at capacity. This usually resolves within **1–2 minutes**.\n\n"
+            "Please wait a moment and try your message again. "
+            "If the issue persists, your API credits may be exhausted — "
+            "check your [OpenRouter dashboard](https://openrouter.ai/account)."
+        )
@@ -0,0 +1,246 @@
+"""Headless OpenAI-compatible proxy over the NeuraChat router (no Streamlit).
+
+    OPENROUTER_API_KEY=sk-or-... python -m neurachat.server --port 8080
+
+Serves POST /v1/chat/completions (SSE when "stream": true), GET /v1/models,
+GET /healthz and GET /metrics. Besides the usual OpenAI fields a request may
+carry "style", "tone", "hedge" and "ctx_budget"; "model" is a model id, a
+sidebar label, or "auto" for the default pick. Client system messages are
+appended to the NeuraChat system prompt. When NEURACHAT_PROXY_KEY is set,
+requests must send it as a bearer token.
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .catalog import ModelCatalog, make_catalog
+from .client import BASE_URL, make_client, make_pool
+from .metrics import CONTENT_TYPE
+from .prompts import STYLES, build_system_prompt
+from .router import Router, make_cache, make_health, make_limiter, make_metrics
+from .tokens import count_tokens
+
+_STATUS  = {"connection": 502, "unexpected": 502, "exhausted": 503}
+_BUILTIN = ModelCatalog()
+
+class ProxyError(Exception):
+    def __init__(self, status: int, message: str, kind: str = "invalid_request_error"):
+        super().__init__(message)
+        self.status = status
+        self.kind   = kind
+
+def _content(m) -> str:
+    # A string, or an array of content parts of which only text is supported.
+    c = m.get("content") if isinstance(m, dict) else None
+    if isinstance(c, str):
+        return c
+    if isinstance(c, list) and c and all(isinstance(p, dict) and p.get("type") == "text"
+                                         and isinstance(p.get("text"), str) for p in c):
+        return "".join(p["text"] for p in c)
+    raise ProxyError(400, "each message needs a string 'content' or an array of text parts")
+
+def _flag(v) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "yes", "on")
+    return bool(v)
+
+def parse_request(body: dict, catalog: ModelCatalog | None = None) -> dict:
+    """Validate an OpenAI-style chat request and map it onto Router.stream() arguments.
+    Model ids and labels are resolved against `catalog` (the built-in list by default)."""
+    catalog = catalog or _BUILTIN
+    if not isinstance(body, dict):
+        raise ProxyError(400, "body must be a JSON object")
+    msgs = body.get("messages")
+    if not isinstance(msgs, list) or not msgs:
+        raise ProxyError(400, "'messages' must be a non-empty list")
+    system, history = [], []
+    for m in msgs:
+        content = _content(m)
+        if m.get("role") == "system":
+            system.append(content)
+        elif m.get("role") in ("user", "assistant"):
+            history.append({"role": m["role"], "content": content})
+        else:
+            raise ProxyError(400, f"unsupported role {m.get('role')!r}")
+    if not history or history[-1]["role"] != "user":
+        raise ProxyError(400, "the last message must be from the user")
+
+    for field in ("model", "style", "tone"):
+        if body.get(field) is not None and not isinstance(body[field], str):
+            raise ProxyError(400, f"'{field}' must be a string")
+    model = body.get("model") or "auto"
+    model = catalog.ids.get(model, model)
+    if model not in catalog:
+        if model not in ("auto", "neurachat"):
+            raise ProxyError(404, f"unknown model {model!r}", "model_not_found")
+        model = catalog.models[0][1]
+    style = body.get("style") or "Balanced"
+    if style not in STYLES:
+        raise ProxyError(400, f"unknown style {style!r}; one of {', '.join(STYLES)}")
+    prompt = build_system_prompt(style, body.get("tone") or "Professional")
+    if system:
+        prompt += "\n\n" + "\n\n".join(system)
+    try:
+        return {
+            "messages":    history,
+            "primary":     model,
+            "system":      prompt,
+            "temperature": float(0.7 if body.get("temperature") is None else body["temperature"]),
+            "max_tokens":  int(body.get("max_tokens") or body.get("max_completion_tokens") or 2048),
+            "ctx_budget":  int(body.get("ctx_budget") or 8192),
+            "hedge":       _flag(body.get("hedge", False)),
+        }
+    except (TypeError, ValueError) as e:
+        raise ProxyError(400, f"bad numeric field: {e}") from None
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    router: Router        = None
+    catalog: ModelCatalog = None
+    api_key: str          = ""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, ctype: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, obj: dict):
+        self._send(status, json.dumps(obj).encode())
+
+    def _error(self, status: int, message: str, kind: str):
+        self._json(status, {"error": {"message": message, "type": kind, "code": status}})
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/healthz":
+            self._json(200, {"status": "ok"})
+        elif path == "/metrics":
+            self._send(200, self.router.metrics.render().encode(), CONTENT_TYPE)
+        elif path == "/v1/models":
+            self._json(200, {"object": "list", "data": [
+                {"id": mid, "object": "model", "owned_by": mid.split("/")[0], "name": label,
+                 "context_length": ctx, "pricing": dict(zip(("prompt", "completion"), self.catalog.pricing(mid)))}
+                for label, mid, ctx in self.catalog.models]})
+        else:
+            self._error(404, "not found", "not_found")
+
+    def do_POST(self):
+        try:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True   # the body's extent is unknown
+                raise ProxyError(400, "bad Content-Length header")
+            raw = self.rfile.read(length)
+            if self.path.split("?")[0].rstrip("/") != "/v1/chat/completions":
+                raise ProxyError(404, "not found", "not_found")
+            if self.api_key and self.headers.get("Authorization", "") != f"Bearer {self.api_key}":
+                raise ProxyError(401, "invalid proxy key", "authentication_error")
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                raise ProxyError(400, "body is not valid JSON") from None
+            req = parse_request(body, self.catalog)
+        except ProxyError as e:
+            return self._error(e.status, str(e), e.kind)
+
+        rid, created, info = f"chatcmpl-{uuid.uuid4().hex[:24]}", int(time.time()), {}
+        chunks = self.router.stream(info=info, **req)
+        try:
+            if _flag(body.get("stream")):
+                self._stream(chunks, rid, created, req, info)
+            else:
+                self._complete(chunks, rid, created, req, info)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True   # client went away; closing the generator cancels upstream
+        finally:
+            chunks.close()
+
+    def _extension(self, info: dict) -> dict:
+        return {k: info[k] for k in ("model", "cached", "coalesced", "trimmed", "resumed", "error") if k in info}
+
+    def _complete(self, chunks, rid: str, created: int, req: dict, info: dict):
+        text = "".join(chunks)
+        if info.get("error"):
+            return self._error(_STATUS.get(info["error"], 502), text.strip(), info["error"])
+        prompt = count_tokens(req["system"]) + sum(count_tokens(m["content"]) for m in req["messages"])
+        done   = count_tokens(text)
+        self._json(200, {
+            "id": rid, "object": "chat.completion", "created": created,
+            "model": info.get("model", req["primary"]),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": prompt, "completion_tokens": done, "total_tokens": prompt + done},
+            "neurachat": self._extension(info),
+        })
+
+    def _stream(self, chunks, rid: str, created: int, req: dict, info: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta: dict, finish=None, **extra):
+            obj = {"id": rid, "object": "chat.completion.chunk", "created": created,
+                   "model": info.get("model", req["primary"]),
+                   "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+            self._chunk(f"data: {json.dumps(obj)}\n\n".encode())
+
+        event({"role": "assistant", "content": ""})
+        for text in chunks:
+            event({"content": text})
+        # Errors were streamed as readable text; the final chunk says so.
+        event({}, "stop", neurachat=self._extension(info))
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+class ProxyServer(ThreadingHTTPServer):
+    daemon_threads     = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def serve(router: Router, host: str = "127.0.0.1", port: int = 8080, api_key: str = "",
+          catalog: ModelCatalog | None = None) -> ProxyServer:
+    handler = type("Handler", (ProxyHandler,), {"router": router, "api_key": api_key,
+                                                "catalog": catalog or _BUILTIN})
+    return ProxyServer((host, port), handler)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default=os.getenv("NEURACHAT_PROXY_HOST", "127.0.0.1"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("NEURACHAT_PROXY_PORT", "8080")))
+    ap.add_argument("--base-url", default=BASE_URL, help="upstream OpenAI-compatible endpoint")
+    args = ap.parse_args(argv)
+
+    key = os.getenv("OPENROUTER_API_KEY", "")
+    if not key:
+        ap.error("OPENROUTER_API_KEY is not set")
+    pool = make_pool()
+    pool.prewarm(args.base_url)
+    catalog = make_catalog(pool.client, args.base_url)
+    router  = Router(make_client(key, base_url=args.base_url, pool=pool), catalog, make_health(),
+                     make_cache(), make_metrics(), make_limiter())
+    srv = serve(router, args.host, args.port, os.getenv("NEURACHAT_PROXY_KEY", ""), catalog)
+    print(f"NeuraChat proxy on http://{args.host}:{args.port}/v1", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Session statistics — updated once per appended message, read in O(1)."""
+import bisect, math
+
+class LatencyHistogram:
+    # Log-spaced buckets from 50 ms to ~10 min (~5% relative error); values above
+    # the last edge land in an overflow bucket.
+    def __init__(self, lo: float = 0.05, hi: float = 600.0, growth: float = 1.1):
+        n = int(math.log(hi / lo, growth)) + 1
+        self.edges  = [lo * growth ** i for i in range(n)]
+        self.counts = [0] * (n + 1)
+        self.n      = 0
+        self.total  = 0.0
+        self.max    = 0.0
+
+    def add(self, x: float):
+        self.counts[bisect.bisect_left(self.edges, x)] += 1
+        self.n     += 1
+        self.total += x
+        self.max    = max(self.max, x)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def quantile(self, q: float) -> float:
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return min(self.edges[i] if i < len(self.edges) else self.max, self.max)
+        return self.max
+
+class SessionStats:
+    def __init__(self):
+        self.user      = 0
+        self.assistant = 0
+        self.words     = 0
+        self.tokens    = 0
+        self.prompt    = 0          # upstream prompt tokens, as reported in usage
+        self.cached    = 0          # of which served from the provider's prompt cache
+        self.latency   = LatencyHistogram()
+
+    @classmethod
+    def from_messages(cls, messages: list, count=None) -> "SessionStats":
+        s = cls()
+        for m in messages:
+            s.add(m, count)
+        return s
+
+    def add(self, m: dict, count=None):
+        if m["role"] == "user":
+            self.user += 1
+        elif m["role"] == "assistant":
+            self.assistant += 1
+        self.words += len(m["content"].split())
+        if count is not None:
+            self.tokens += count(m)
+        if m.get("usage"):
+            self.prompt += m["usage"]["prompt_tokens"]
+            self.cached += m["usage"]["cached_tokens"]
+        if m.get("timing"):
+            self.latency.add(m["timing"])
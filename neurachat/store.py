@@ -0,0 +1,283 @@
+"""Conversation store — SQLite (WAL) with write-behind appends and idle spill.
+
+Each browser session is a `Conversation` keyed by a URL-safe token. Only a
+suffix of its history is held in memory: appends are queued to a writer
+thread, older turns are paged in from disk on demand, and conversations left
+idle are spilled (their in-memory messages dropped) until the tab comes back.
+"""
+from __future__ import annotations
+import atexit, html, json, logging, queue, re, secrets, sqlite3, threading, time, weakref
+
+from .cache import chain_hash
+
+log = logging.getLogger(__name__)
+
+# Keys not worth persisting (render caches rebuilt on demand).
+_TRANSIENT = {"_meta"}
+# A failed batch is retried with backoff this many times before it is dropped.
+_WRITE_RETRIES = 5
+
+def _dump(m: dict) -> str:
+    return json.dumps({k: v for k, v in m.items() if k not in ("role", "content") and k not in _TRANSIENT},
+                      separators=(",", ":"))
+
+def _load(role: str, content: str, meta: str) -> dict:
+    m = {"role": role, "content": content}
+    m.update(json.loads(meta))
+    return m
+
+# Snippet highlight markers; swapped for <mark> after the text is HTML-escaped.
+_HL_ON, _HL_OFF = "\x02", "\x03"
+_TERM = re.compile(r"\w+")
+_TOKEN = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+def fts_query(text: str) -> str:
+    """Quote each word so user input can't hit FTS5 syntax; prefix-match the last one."""
+    words = _TERM.findall(text)
+    if not words:
+        return ""
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+def snippet_html(snippet: str) -> str:
+    return html.escape(snippet).replace(_HL_ON, "<mark>").replace(_HL_OFF, "</mark>")
+
+class Conversation:
+    """The loaded suffix of one session's history; `messages[0]` has index `offset`."""
+    def __init__(self, store: "ConversationStore", token: str, total: int, last_h: str):
+        self.store     = store
+        self.token     = token
+        self.total     = total
+        self.offset    = total
+        self.messages  = []
+        self.last_h    = last_h
+        self.last_used = time.monotonic()
+        self._lock     = threading.Lock()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def tail(self, n: int) -> list:
+        """Newest `n` messages, paging older ones in from disk if needed."""
+        self.touch()
+        with self._lock:
+            want = max(0, self.total - n)
+            if want < self.offset:
+                self.messages[:0] = self.store.page(self.token, want, self.offset)
+                self.offset = want
+            return self.messages[len(self.messages) - min(n, len(self.messages)):]
+
+    def all(self) -> list:
+        return self.tail(self.total)
+
+    def append(self, m: dict):
+        self.touch()
+        with self._lock:
+            # Chain hash stored with the message, so a resumed or spilled
+            # conversation can continue history_hash() without its prefix.
+            m["_h"] = self.last_h = chain_hash(self.last_h, m["role"], m["content"])
+            self.messages.append(m)
+            self.store.append(self.token, self.total, m)
+            self.total += 1
+
+    def clear(self):
+        with self._lock:
+            self.store.delete(self.token)
+            self.messages, self.total, self.offset, self.last_h = [], 0, 0, ""
+
+    def spill(self):
+        # Everything in memory is already queued for disk; drop it.
+        with self._lock:
+            self.store.flush()
+            self.messages = []
+            self.offset   = self.total
+
+class ConversationStore:
+    def __init__(self, path: str, idle_after: float = 900.0):
+        self.idle_after = idle_after
+        self._db   = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._q    = queue.Queue()
+        self._live = weakref.WeakValueDictionary()   # token -> Conversation
+        self.spilled = 0
+        self.write_errors = 0
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "token TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+                "meta TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (token, seq)) WITHOUT ROWID"
+            )
+            self.has_fts = self._init_fts()
+        threading.Thread(target=self._writer, daemon=True, name="nc-store-writer").start()
+        # The writer is a daemon thread: give queued appends a chance to land at exit.
+        atexit.register(self.flush, 5.0)
+        if idle_after > 0:
+            threading.Thread(target=self._reaper, daemon=True, name="nc-store-reaper").start()
+
+    def _init_fts(self) -> bool:
+        # Full-text index kept in step with `messages` by the writer thread.
+        # Porter stemming lets "networking" find "network". Needs SQLite
+        # built with FTS5; search() falls back to a LIKE scan without it.
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                "content, token UNINDEXED, seq UNINDEXED, role UNINDEXED, tokenize='porter unicode61')"
+            )
+        except sqlite3.OperationalError:
+            return False
+        if not self._db.execute("SELECT 1 FROM messages_fts LIMIT 1").fetchone():
+            self._db.execute("INSERT INTO messages_fts (content, token, seq, role) "
+                             "SELECT content, token, seq, role FROM messages")
+        return True
+
+    # ── sessions ────────────────────────────────────────────────────────────
+    @staticmethod
+    def new_token() -> str:
+        return secrets.token_urlsafe(12)
+
+    @staticmethod
+    def valid_token(token) -> bool:
+        # Tokens come back through the URL; only accept what new_token() could mint.
+        return isinstance(token, str) and bool(_TOKEN.fullmatch(token))
+
+    def open(self, token: str) -> Conversation:
+        """Conversation for `token` (empty if unknown). Loads nothing but its size."""
+        conv = self._live.get(token)
+        if conv is None:
+            self.flush()
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT COUNT(*), (SELECT meta FROM messages WHERE token=? ORDER BY seq DESC LIMIT 1) "
+                    "FROM messages WHERE token=?", (token, token)).fetchone()
+            last_h = json.loads(row[1]).get("_h", "") if row[1] else ""
+            conv = self._live[token] = Conversation(self, token, row[0], last_h)
+        conv.touch()
+        return conv
+
+    # ── storage ─────────────────────────────────────────────────────────────
+    def append(self, token: str, seq: int, m: dict):
+        self._q.put((token, seq, m["role"], m["content"], _dump(m), time.time()))
+
+    def page(self, token: str, start: int, stop: int) -> list:
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role, content, meta FROM messages WHERE token=? AND seq>=? AND seq<? ORDER BY seq",
+                (token, start, stop)).fetchall()
+        return [_load(*r) for r in rows]
+
+    def delete(self, token: str):
+        self.flush()
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE token=?", (token,))
+            if self.has_fts:
+                self._db.execute("DELETE FROM messages_fts WHERE token=?", (token,))
+
+    def search(self, text: str, tokens: list | None = None, limit: int = 20) -> list:
+        """Best matches for `text` as (token, seq, role, created, snippet_html).
+
+        `tokens` limits the search to those conversations; None searches all.
+        """
+        self.flush()
+        scope, args = "", []
+        if tokens is not None:
+            if not tokens:
+                return []
+            scope = f" AND f.token IN ({','.join('?' * len(tokens))})"
+            args  = list(tokens)
+        with self._lock:
+            if self.has_fts:
+                q = fts_query(text)
+                if not q:
+                    return []
+                rows = self._db.execute(
+                    f"SELECT f.token, f.seq, f.role, m.created, "
+                    f"snippet(messages_fts, 0, '{_HL_ON}', '{_HL_OFF}', '…', 12) "
+                    f"FROM messages_fts f JOIN messages m ON m.token=f.token AND m.seq=f.seq "
+                    f"WHERE messages_fts MATCH ?{scope} ORDER BY rank LIMIT ?",
+                    [q] + args + [limit]).fetchall()
+            else:
+                needle = text.strip()
+                if not needle:
+                    return []
+                rows = self._db.execute(
+                    f"SELECT f.token, f.seq, f.role, f.created, f.content FROM messages f "
+                    f"WHERE f.content LIKE ? ESCAPE '\\'{scope} ORDER BY f.created DESC LIMIT ?",
+                    ["%" + re.sub(r"([%_\\])", r"\\\1", needle) + "%"] + args + [limit]).fetchall()
+                rows = [r[:4] + (_like_snippet(r[4], needle),) for r in rows]
+        return [r[:4] + (snippet_html(r[4]),) for r in rows]
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued append is on disk, or at most `timeout` seconds."""
+        if timeout is None:
+            self._q.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._q.unfinished_tasks
+
+    def _writer(self):
+        # Batches whatever queued up while the previous transaction ran.
+        while True:
+            rows = [self._q.get()]
+            while True:
+                try:
+                    rows.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for attempt in range(_WRITE_RETRIES + 1):
+                    if self._write(rows):
+                        break
+                    if attempt < _WRITE_RETRIES:
+                        time.sleep(min(5.0, 0.1 * 2 ** attempt))
+                else:
+                    log.error("dropped %d queued messages after %d failed writes", len(rows), attempt + 1)
+            finally:
+                for _ in rows:
+                    self._q.task_done()
+
+    def _write(self, rows: list) -> bool:
+        try:
+            with self._lock:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO messages (token, seq, role, content, meta, created) "
+                    "VALUES (?,?,?,?,?,?)", rows)
+                self._index(rows)
+                self._db.execute("COMMIT")
+            return True
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            log.warning("writing %d messages failed: %s", len(rows), e)
+            with self._lock:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+            return False
+
+    def _index(self, rows: list):
+        # Sequence numbers are never rewritten (a cleared conversation's rows are
+        # deleted from both tables first), so the index only ever appends.
+        if self.has_fts:
+            self._db.executemany(
+                "INSERT INTO messages_fts (content, token, seq, role) VALUES (?,?,?,?)",
+                [(r[3], r[0], r[1], r[2]) for r in rows])
+
+    def _reaper(self):
+        while True:
+            time.sleep(max(1.0, self.idle_after / 4))
+            cutoff = time.monotonic() - self.idle_after
+            for conv in list(self._live.values()):
+                if conv.messages and conv.last_used < cutoff:
+                    conv.spill()
+                    self.spilled += 1
+
+def _like_snippet(content: str, needle: str, width: int = 60) -> str:
+    i = content.lower().find(needle.lower())
+    if i < 0:
+        return content[:width * 2]
+    a, b = max(0, i - width), i + len(needle)
+    return ("…" if a else "") + content[a:i] + _HL_ON + content[i:b] + _HL_OFF + \
+           content[b:b + width] + ("…" if b + width < len(content) else "")
@@ -0,0 +1,87 @@
+"""Stylesheet — static rules loaded once, per-theme CSS variables memoized."""
+import os, re
+from functools import lru_cache
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  THEMES
+# ─────────────────────────────────────────────────────────────────────────────
+THEMES = {
+    "🌑 Midnight": {
+        "bg": "#07080f", "bg2": "#0c0e1a",
+        "card": "#111428", "card2": "#0f1223",
+        "acc": "#6d71f0", "ahi": "#a5a8ff", "alo": "#4a4ec8",
+        "soft": "rgba(109,113,240,0.10)", "glow": "rgba(109,113,240,0.22)",
+        "t1": "#f0f2ff", "t2": "#8892b0", "t3": "#3d4466",
+        "brd": "rgba(109,113,240,0.18)", "brd2": "rgba(109,113,240,0.32)", "brd3": "rgba(255,255,255,0.06)",
+        "ubub": "linear-gradient(135deg,#3d4bda,#5865f2,#7c80f5)",
+        "abub": "#111428",
+        "sb": "#09091a",
+        "inp": "#111428",
+        "grain": "radial-gradient(ellipse 80% 60% at 15% 5%,rgba(109,113,240,0.08) 0%,transparent 60%)",
+    },
+    "⚡ Cyberpunk": {
+        "bg": "#040408", "bg2": "#060610",
+        "card": "#080818", "card2": "#06060f",
+        "acc": "#00ff9f", "ahi": "#7affcb", "alo": "#00cc80",
+        "soft": "rgba(0,255,159,0.08)", "glow": "rgba(0,255,159,0.20)",
+        "t1": "#e8fff5", "t2": "#6affcb", "t3": "#1a4433",
+        "brd": "rgba(0,255,159,0.18)", "brd2": "rgba(0,255,159,0.35)", "brd3": "rgba(0,255,159,0.08)",
+        "ubub": "linear-gradient(135deg,#ff2d78,#ff6baa)",
+        "abub": "#08100c",
+        "sb": "#030308",
+        "inp": "#080818",
+        "grain": "radial-gradient(ellipse 70% 60% at 10% 10%,rgba(0,255,159,0.05) 0%,transparent 55%)",
+    },
+    "☀️ Nordic": {
+        "bg": "#f4f6fb", "bg2": "#edf0f8",
+        "card": "#ffffff", "card2": "#f8faff",
+        "acc": "#4f6ef7", "ahi": "#2d4fc5", "alo": "#7b93fb",
+        "soft": "rgba(79,110,247,0.08)", "glow": "rgba(79,110,247,0.18)",
+        "t1": "#1a1d2e", "t2": "#4a5068", "t3": "#9aa0b8",
+        "brd": "rgba(79,110,247,0.14)", "brd2": "rgba(79,110,247,0.30)", "brd3": "rgba(0,0,0,0.07)",
+        "ubub": "linear-gradient(135deg,#4f6ef7,#6b84fa)",
+        "abub": "#ffffff",
+        "sb": "#eaecf6",
+        "inp": "#ffffff",
+        "grain": "radial-gradient(ellipse 80% 60% at 20% 20%,rgba(79,110,247,0.04) 0%,transparent 60%)",
+    },
+    "🌸 Rose": {
+        "bg": "#0d080c", "bg2": "#130b10",
+        "card": "#1a0d14", "card2": "#160b11",
+        "acc": "#f472b6", "ahi": "#fca5d4", "alo": "#db2777",
+        "soft": "rgba(244,114,182,0.10)", "glow": "rgba(244,114,182,0.22)",
+        "t1": "#fff0f7", "t2": "#c77da0", "t3": "#5a2d44",
+        "brd": "rgba(244,114,182,0.18)", "brd2": "rgba(244,114,182,0.32)", "brd3": "rgba(244,114,182,0.07)",
+        "ubub": "linear-gradient(135deg,#db2777,#f472b6)",
+        "abub": "#1a0d14",
+        "sb": "#0c0810",
+        "inp": "#1a0d14",
+        "grain": "radial-gradient(ellipse 80% 60% at 15% 10%,rgba(244,114,182,0.07) 0%,transparent 60%)",
+    },
+}
+
+# Every theme key becomes a CSS custom property: t["acc"] -> var(--acc).
+THEME_VARS = list(next(iter(THEMES.values())))
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  CSS — Production-ready, fully responsive, sidebar fixed
+# ─────────────────────────────────────────────────────────────────────────────
+CSS_PATH = os.path.join(os.path.dirname(__file__), "neurachat.css")
+
+def minify(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def _load() -> str:
+    with open(CSS_PATH, encoding="utf-8") as f:
+        return minify(f.read())
+
+# Identical on every rerun for every session, so it is built exactly once.
+STATIC_CSS = f"<style>{_load()}</style>"
+
+@lru_cache(maxsize=None)
+def theme_css(name: str) -> str:
+    t = THEMES[name]
+    return "<style>:root{" + "".join(f"--{k}:{t[k]};" for k in THEME_VARS) + "}</style>"
@@ -0,0 +1,47 @@
+"""Token counting — local BPE tokenizer with a heuristic fallback."""
+import os, re, threading
+from functools import lru_cache
+
+ENCODING = os.getenv("NEURACHAT_TOKENIZER", "cl100k_base")
+
+_enc      = None
+_enc_lock = threading.Lock()
+_loaded   = False
+_PIECE    = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+def _encoder():
+    # tiktoken is optional and may need to fetch its BPE file on first use;
+    # any failure leaves the heuristic in charge for the life of the process.
+    global _enc, _loaded
+    if not _loaded:
+        with _enc_lock:
+            if not _loaded:
+                try:
+                    import tiktoken
+                    _enc = tiktoken.get_encoding(ENCODING)
+                except Exception:
+                    _enc = None
+                _loaded = True
+    return _enc
+
+def has_tokenizer() -> bool:
+    return _encoder() is not None
+
+def heuristic_tokens(text: str) -> int:
+    # Roughly how BPE splits: every punctuation mark is a token and long words
+    # break into ~4-character pieces. Much closer than words * 1.35 on code.
+    return sum(1 if len(p) <= 4 else (len(p) + 3) // 4 for p in _PIECE.findall(text))
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return heuristic_tokens(text)
+
+def message_tokens(m: dict) -> int:
+    # Messages never change once appended, so the count lives on the record.
+    n = m.get("tokens")
+    if n is None:
+        n = m["tokens"] = count_tokens(m["content"])
+    return n
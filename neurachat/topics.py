@@ -0,0 +1,65 @@
+"""Topic detection — one precompiled word-boundary matcher, weighted multi-label scores."""
+from __future__ import annotations
+import re
+
+REF_MAP = {
+    "code":    ["Stack Overflow", "GitHub", "Official Docs"],
+    "math":    ["Wolfram Alpha", "ArXiv", "Khan Academy"],
+    "science": ["PubMed", "Nature Journals", "arXiv"],
+    "writing": ["Style Guides", "Literary Resources", "Grammarly"],
+    "general": ["Wikipedia", "Web Corpus", "Academic Sources"],
+    "analysis":["Research Papers", "Statistical DBs", "Industry Reports"],
+    "history": ["Britannica", "Historical Archives", "Academic Journals"],
+}
+# Dict order is the tie-break precedence, same as the old if-chain.
+KEYWORDS = {
+    "code":     {"code","python","javascript","function","bug","api","sql","html","css","def","const","git",
+                 "react","node","docker","typescript","golang","rust","java","php","c++","c#","kubernetes"},
+    "math":     {"math","equation","calculus","algebra","integral","formula","statistics","matrix","derivative",
+                 "proof","theorem","probability"},
+    "science":  {"science","physics","chemistry","biology","quantum","genetics","molecule","atom"},
+    "writing":  {"write","writing","essay","story","poem","email","letter","blog","creative","fiction","paragraph"},
+    "analysis": {"analyze","analyse","analysis","compare","evaluate","research","investigate","assess","explain"},
+    "history":  {"history","historical","war","ancient","civilization","revolution","century"},
+}
+# Strong signals count double, generic verbs half. Everything else weighs 1.
+WEIGHTS = {
+    "python": 2.0, "javascript": 2.0, "typescript": 2.0, "sql": 2.0, "c++": 2.0, "docker": 2.0,
+    "calculus": 2.0, "derivative": 2.0, "integral": 2.0, "quantum": 2.0,
+    "explain": 0.5, "write": 0.5, "code": 1.5, "node": 0.5, "proof": 0.5, "letter": 0.5,
+}
+
+# Every keyword plus a light suffix ("equations", "compared") maps to its
+# topic, so scoring is one tokenizer pass and one dict lookup per word. Whole
+# words only: "api" no longer fires inside "capital" nor "war" in "software".
+_SUFFIXES = ("", "s", "es", "d", "ed", "ing", "er", "ers")
+_KW_TOPIC = {kw: topic for topic, kws in KEYWORDS.items() for kw in kws}
+_VARIANTS = {kw + suf: (topic, WEIGHTS.get(kw, 1.0))
+             for kw, topic in _KW_TOPIC.items() for suf in _SUFFIXES}
+_WORD     = re.compile(r"[\w+#]+")
+
+def topic_scores(text: str) -> dict:
+    scores = dict.fromkeys(KEYWORDS, 0.0)
+    get    = _VARIANTS.get
+    for w in _WORD.findall(text.lower()):
+        hit = get(w)
+        if hit:
+            scores[hit[0]] += hit[1]
+    return scores
+
+def detect_topic(text: str, scores: dict | None = None) -> str:
+    scores = topic_scores(text) if scores is None else scores
+    best   = max(scores, key=scores.get)
+    return best if scores[best] > 0 else "general"
+
+def get_refs(prompt: str, scores: dict | None = None) -> list:
+    # Sources of the top topic; a runner-up scoring at least half as much
+    # contributes the third pill.
+    scores = topic_scores(prompt) if scores is None else scores
+    ranked = [t for t in sorted(scores, key=scores.get, reverse=True) if scores[t] > 0]
+    if not ranked:
+        return REF_MAP["general"][:3]
+    refs = REF_MAP[ranked[0]][:3]
+    if len(ranked) > 1 and scores[ranked[1]] * 2 >= scores[ranked[0]]:
+        refs = refs[:2] + [r for r in REF_MAP[ranked[1]] if r not in refs][:1]
+    return refs
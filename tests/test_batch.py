@@ -0,0 +1,45 @@
+"""Batch runner: a bad item becomes an error record, never the end of the batch."""
+import json
+
+import pytest
+
+from neurachat.batch import read_items, run
+
+class FakeRouter:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def stream(self, messages, info, **kw):
+        if messages[-1]["content"] == self.fail_on:
+            raise RuntimeError("boom")
+        info["model"] = kw["primary"]
+        yield "echo: " + messages[-1]["content"]
+
+def _write(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+def _results(path):
+    return {r["id"]: r for r in map(json.loads, open(path, encoding="utf-8"))}
+
+def test_malformed_item_does_not_abort_the_batch(tmp_path):
+    src = _write(tmp_path / "in.jsonl", ['{"prompt": "one"}', '{"prompt": "x", "model": ["a"]}', '"three"'])
+    out = str(tmp_path / "out.jsonl")
+    counts = run(FakeRouter(), read_items(src), out, concurrency=2)
+    assert counts == {"skipped": 0, "ok": 2, "failed": 1}
+    res = _results(out)
+    assert res[2]["error"] == "invalid"
+    assert res[1]["reply"] == "echo: one" and res[3]["reply"] == "echo: three"
+
+def test_unexpected_exception_is_recorded_and_retried(tmp_path):
+    src = _write(tmp_path / "in.jsonl", ['"ok"', '"explode"'])
+    out = str(tmp_path / "out.jsonl")
+    assert run(FakeRouter(fail_on="explode"), read_items(src), out)["failed"] == 1
+    assert _results(out)[2]["error"] == "unexpected"
+    # The rerun skips the finished item and retries the failed one.
+    assert run(FakeRouter(), read_items(src), out) == {"skipped": 1, "ok": 1, "failed": 0}
+
+def test_non_object_line_is_rejected_with_its_position(tmp_path):
+    src = _write(tmp_path / "in.jsonl", ['"ok"', "[1, 2]"])
+    with pytest.raises(SystemExit, match=r"in\.jsonl:2:"):
+        read_items(src)
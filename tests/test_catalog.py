@@ -0,0 +1,33 @@
+"""Model catalog: the disk cache can never break startup."""
+import json
+
+import pytest
+
+from neurachat.catalog import ModelCatalog
+from neurachat.context import DEFAULT_WINDOW
+from neurachat.models import FREE_MODELS
+
+SEED_IDS = [mid for _, mid, _ in FREE_MODELS]
+
+def _catalog(tmp_path, content):
+    path = tmp_path / "models.json"
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+    return ModelCatalog(path=str(path))
+
+def test_entries_missing_fields_get_defaults(tmp_path):
+    cat = _catalog(tmp_path, {"models": [{"id": "a/b:free", "name": "B"}]})
+    assert cat.source == "disk"
+    assert cat["a/b:free"] == DEFAULT_WINDOW
+    assert cat.pricing("a/b:free") == (0.0, 0.0)
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    [1, 2],
+    {"models": None},
+    {"models": [{"name": "no id"}, "junk", {"id": ["x"]}]},
+    {"models": [{"id": "a/b:free", "ctx": "lots"}]},
+])
+def test_unusable_cache_falls_back_to_seed(tmp_path, content):
+    cat = _catalog(tmp_path, content)
+    assert cat.source == "built-in"
+    assert [mid for _, mid, _ in cat.models] == SEED_IDS
@@ -0,0 +1,79 @@
+"""Hedged racing against a fake client: no network, streams are scripted."""
+import threading
+from types import SimpleNamespace
+
+from neurachat.hedge import race
+
+def _chunk(text):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class FakeStream:
+    # Yields `parts` as chat-completion chunks. With `stall`, blocks before the
+    # first chunk until close() is called, like a model that never answers.
+    def __init__(self, parts, stall=False):
+        self.parts  = parts
+        self.closed = threading.Event()
+        self.stall  = stall
+
+    def __iter__(self):
+        if self.stall:
+            self.closed.wait(5)
+            if self.closed.is_set():
+                raise ConnectionError("closed by client")
+        for p in self.parts:
+            yield _chunk(p)
+
+    def close(self):
+        self.closed.set()
+
+class FakeClient:
+    def __init__(self, streams: dict):
+        self.streams = streams
+        self.opened  = []
+
+    def open_stream(self, model):
+        self.opened.append(model)
+        s = self.streams[model]
+        if isinstance(s, Exception):
+            raise s
+        return s
+
+def _events(gen):
+    return [(kind, a.model, payload) for kind, a, payload in gen]
+
+def test_single_candidate_streams_to_done():
+    client = FakeClient({"a": FakeStream(["Hel", "lo"])})
+    assert _events(race(["a"], client.open_stream)) == [
+        ("chunk", "a", "Hel"), ("chunk", "a", "lo"), ("done", "a", None)]
+
+def test_hedge_cancels_the_loser():
+    slow, fast = FakeStream(["late"], stall=True), FakeStream(["fast", "!"])
+    client = FakeClient({"a": slow, "b": fast})
+    events = _events(race(["a", "b"], client.open_stream, deadline=0.05, parallel=2))
+    assert events == [("chunk", "b", "fast"), ("chunk", "b", "!"), ("done", "b", None)]
+    assert client.opened == ["a", "b"]
+    assert slow.closed.wait(1)
+
+def test_failure_before_first_token_launches_next():
+    boom = RuntimeError("503 overloaded")
+    client = FakeClient({"a": boom, "b": FakeStream(["ok"])})
+    events = _events(race(["a", "b"], client.open_stream))
+    assert events == [("fail", "a", boom), ("chunk", "b", "ok"), ("done", "b", None)]
+
+def test_empty_response_fails_with_none():
+    client = FakeClient({"a": FakeStream([]), "b": FakeStream(["ok"])})
+    events = _events(race(["a", "b"], client.open_stream))
+    assert events[0] == ("fail", "a", None)
+    assert events[-1] == ("done", "b", None)
+
+def test_no_hedge_without_deadline():
+    slow = FakeStream(["x"], stall=True)
+    client = FakeClient({"a": slow, "b": FakeStream(["ok"])})
+    seen = []
+    def give_up():
+        seen.extend(client.opened)
+        slow.close()
+    threading.Timer(0.2, give_up).start()
+    events = _events(race(["a", "b"], client.open_stream))
+    assert seen == ["a"]   # b only starts once a has failed
+    assert [e[:2] for e in events] == [("fail", "a"), ("chunk", "b"), ("done", "b")]
@@ -0,0 +1,30 @@
+"""Adaptive token buckets: back-off and recovery."""
+from neurachat.limiter import RateLimiter
+
+def test_model_429_leaves_other_models_free():
+    limiter = RateLimiter()
+    limiter.limited("a", "k", None)
+    assert limiter.wait("a", "k") > 0
+    assert limiter.wait("b", "k") == 0
+    assert limiter.spread(["a", "b"], "k") == ["b", "a"]
+
+def test_spent_key_blocks_every_model():
+    limiter = RateLimiter()
+    limiter.limited("a", "k", {"x-ratelimit-remaining": "0", "x-ratelimit-reset": "20"})
+    assert limiter.wait("b", "k") > 15
+
+def test_429_after_recovery_to_unlimited():
+    # A bucket relaxed back to unlimited (rate 0) must not divide by its rate.
+    limiter = RateLimiter(model_rate=0)
+    limiter.limited("m", "k", None)
+    for _ in range(8):
+        limiter.observe("m", "k", {})
+    limiter.limited("m", "k", None)
+    assert limiter.wait("m", "k") > 0
+
+def test_no_recovery_while_blocked():
+    limiter = RateLimiter()
+    limiter.limited("m", "k", {"retry-after": "30"})
+    rate = limiter.snapshot()["k/m"]["rate"]
+    limiter.observe("m", "k", {})
+    assert limiter.snapshot()["k/m"]["rate"] == rate
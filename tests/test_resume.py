@@ -0,0 +1,47 @@
+"""Splicing a continuation onto a reply that broke off mid-stream."""
+from neurachat.resume import CONTINUE_PROMPT, MIN_OVERLAP, Splicer, continuation, overlap
+
+PARTIAL = ("Docker networks isolate containers. A user-defined bridge gives each "
+           "container a DNS name, so services can reach each other by")
+
+def _splice(partial, text, step=7, window=160):
+    # Feed `text` in small deltas, the way a stream arrives, then drain.
+    s = Splicer(partial, window)
+    out = "".join(s.push(text[i:i + step]) for i in range(0, len(text), step)) + s.drain()
+    return out, s.dropped
+
+def test_continuation_appends_partial_and_prompt():
+    msgs = [{"role": "user", "content": "explain docker networking"}]
+    assert continuation(msgs, PARTIAL) == msgs + [{"role": "assistant", "content": PARTIAL},
+                                                  {"role": "user", "content": CONTINUE_PROMPT}]
+
+def test_restart_of_whole_partial_is_dropped():
+    out, dropped = _splice(PARTIAL, PARTIAL + " name.\n\nNext, publish ports.")
+    assert out == " name.\n\nNext, publish ports."
+    assert dropped == len(PARTIAL)
+
+def test_restart_after_leading_whitespace_is_dropped():
+    out, dropped = _splice(PARTIAL, "\n" + PARTIAL + " name.")
+    assert out == " name."
+    assert dropped == len(PARTIAL) + 1
+
+def test_repeated_tail_is_dropped():
+    tail = PARTIAL[-22:]
+    out, dropped = _splice(PARTIAL, tail + " their service name. " + "More text follows. " * 10)
+    assert out.startswith(" their service name.")
+    assert dropped == len(tail)
+
+def test_short_continuation_passes_through():
+    out, dropped = _splice(PARTIAL, " name.")
+    assert out == " name."
+    assert dropped == 0
+
+def test_coincidental_short_overlap_is_kept():
+    assert overlap(PARTIAL, "by" + " x" * 10) == 0
+    assert MIN_OVERLAP > len("by")
+
+def test_text_after_the_window_is_not_held():
+    s = Splicer(PARTIAL, window=16)
+    assert s.push("a fresh continuation that") == "a fresh continuation that"
+    assert s.push(" keeps going") == " keeps going"
+    assert s.drain() == ""
@@ -0,0 +1,84 @@
+"""Fallback routing against a fake OpenRouter client: no network."""
+from types import SimpleNamespace
+
+import openai
+
+from neurachat.health import ModelHealth
+from neurachat.limiter import RateLimiter
+from neurachat.router import Router
+
+def _chunk(text):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+def _rate_limited(headers=None):
+    response = SimpleNamespace(status_code=429, headers=headers or {}, request=None)
+    return openai.RateLimitError("429 rate limited upstream", response=response, body=None)
+
+def _broken(deltas):
+    # A stream that drops the connection after `deltas`.
+    yield from (_chunk(t) for t in deltas)
+    raise ConnectionError("connection reset mid-stream")
+
+class FakeClient:
+    # Scripted replies per model: a list of deltas, an exception to raise, or
+    # ("break", deltas) for a stream that fails after sending them.
+    def __init__(self, replies: dict):
+        self.replies = replies
+        self.calls   = []
+        self.chat    = SimpleNamespace(completions=SimpleNamespace(
+            with_raw_response=SimpleNamespace(create=self.create)))
+
+    def create(self, model, max_tokens, **kw):
+        self.calls.append((model, max_tokens))
+        r = self.replies[model]
+        if isinstance(r, Exception):
+            raise r
+        if isinstance(r, tuple):
+            return SimpleNamespace(headers={}, parse=lambda: _broken(r[1]))
+        return SimpleNamespace(headers={}, parse=lambda: iter([_chunk(t) for t in r]))
+
+def _router(client, limiter=None):
+    return Router(client, {"a": 8192, "b": 8192, "c": 8192}, health=ModelHealth(),
+                  limiter=limiter or RateLimiter())
+
+def _ask(router, **kw):
+    info = {}
+    text = "".join(router.stream([{"role": "user", "content": "hi"}], "a", "system", 0.7,
+                                 kw.pop("max_tokens", 512), info=info, **kw))
+    return text, info
+
+def test_single_model_429_falls_through_to_next_candidate():
+    client = FakeClient({"a": _rate_limited(), "b": ["hello"], "c": ["unused"]})
+    text, info = _ask(_router(client))
+    assert text == "hello"
+    assert info["model"] == "b"
+    assert [m for m, _ in client.calls] == ["a", "b"]
+
+def test_key_wide_429_holds_every_model_back():
+    limiter = RateLimiter(max_wait=0.1)
+    client  = FakeClient({"a": _rate_limited({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "30"}),
+                          "b": ["hello"], "c": ["hello"]})
+    router  = _router(client, limiter)
+    text, info = _ask(router)
+    assert info["error"] == "exhausted"
+    assert [m for m, _ in client.calls] == ["a"]
+    assert limiter.wait("b", router.key) > 25
+
+PARTIAL = "Docker networks isolate containers from each other and from the host by default. "
+
+def test_continuation_stays_within_max_tokens():
+    client = FakeClient({"a": ("break", [PARTIAL]), "b": ["Bridges give each container a DNS name."],
+                         "c": ["unused"]})
+    text, info = _ask(_router(client), max_tokens=100)
+    assert text == PARTIAL + "Bridges give each container a DNS name."
+    assert info["resumed"] == [{"model": "a", "at": len(PARTIAL)}]
+    (_, first), (_, cont) = client.calls
+    assert first == 100
+    assert 1 <= cont < 100
+
+def test_no_continuation_once_max_tokens_is_spent():
+    client = FakeClient({"a": ("break", [PARTIAL]), "b": ["more"], "c": ["more"]})
+    text, info = _ask(_router(client), max_tokens=5)
+    assert text == PARTIAL
+    assert info["model"] == "a" and "error" not in info and "resumed" not in info
+    assert [m for m, _ in client.calls] == ["a"]
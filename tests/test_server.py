@@ -0,0 +1,57 @@
+"""Proxy request validation: malformed input is a 400, never a dropped connection."""
+import http.client, json, threading
+
+import pytest
+
+from neurachat.server import ProxyError, parse_request, serve
+
+USER = [{"role": "user", "content": "hi"}]
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    {"messages": []},
+    {"messages": USER, "model": ["a"]},
+    {"messages": USER, "style": {"x": 1}},
+    {"messages": USER, "tone": 3},
+    {"messages": USER, "temperature": "hot"},
+    {"messages": [{"role": "user", "content": [{"type": "image_url"}]}]},
+])
+def test_malformed_requests_are_400(body):
+    with pytest.raises(ProxyError) as e:
+        parse_request(body)
+    assert e.value.status == 400
+
+def test_lenient_fields():
+    req = parse_request({"messages": [{"role": "user", "content": [{"type": "text", "text": "a"},
+                                                                   {"type": "text", "text": "b"}]}],
+                         "temperature": None, "hedge": "false", "style": None})
+    assert req["messages"] == [{"role": "user", "content": "ab"}]
+    assert req["temperature"] == 0.7
+    assert req["hedge"] is False
+
+@pytest.fixture
+def proxy():
+    srv = serve(router=None, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+
+def _post(port, body: bytes, headers: dict):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.putrequest("POST", "/v1/chat/completions")
+    for k, v in headers.items():
+        conn.putheader(k, v)
+    conn.endheaders(body)
+    r = conn.getresponse()
+    return r.status, json.loads(r.read())
+
+def test_bad_content_length_is_400(proxy):
+    status, body = _post(proxy, b"{}", {"Content-Length": "lots"})
+    assert status == 400
+    assert "Content-Length" in body["error"]["message"]
+
+def test_non_string_model_is_400(proxy):
+    raw = json.dumps({"messages": USER, "model": ["a"]}).encode()
+    status, body = _post(proxy, raw, {"Content-Length": str(len(raw))})
+    assert status == 400
+    assert body["error"]["message"] == "'model' must be a string"